@@ -5,18 +5,25 @@ Author: Gabriel Demetrios Lafis
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import numpy as np
 import json
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 # Configuração da API
 API_URL = "http://localhost:5000"
 
+# Sessão persistente: reutiliza conexões keep-alive entre as requisições
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=16, pool_maxsize=16))
+SESSION.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=16))
+
 
 def check_api_status():
     """Verifica se a API está online"""
     try:
-        response = requests.get(f"{API_URL}/api/status", timeout=5)
+        response = SESSION.get(f"{API_URL}/api/status", timeout=5)
         if response.status_code == 200:
             print("✅ API está online e funcionando!")
             data = response.json()
@@ -35,10 +42,9 @@ def check_api_status():
 def detect_anomaly(features, description=""):
     """Detecta anomalia nos dados fornecidos"""
     try:
-        response = requests.post(
+        response = SESSION.post(
             f"{API_URL}/predict",
             json={"features": features},
-            headers={"Content-Type": "application/json"},
             timeout=10,
         )
 
@@ -96,29 +102,39 @@ def example_3_batch_detection():
     print("EXEMPLO 3: Detecção em Lote")
     print("=" * 60)
 
-    results = []
     num_samples = 5
 
-    for i in range(num_samples):
-        # Alternar entre normal e anômalo
-        if i % 2 == 0:
-            features = np.random.randn(1000).tolist()
-            label = "Normal"
-        else:
-            features = (np.random.randn(1000) * 50).tolist()
-            label = "Potencialmente Anômalo"
-
-        print(f"\nProcessando amostra {i+1}/{num_samples} ({label})...")
-        result = detect_anomaly(features, f"Amostra {i+1}")
-
-        if result:
-            results.append(
-                {
-                    "sample": i + 1,
-                    "is_anomaly": result["is_anomaly"],
-                    "confidence": result["confidence"],
-                }
-            )
+    # Alternar entre normal e anômalo
+    samples = [
+        (np.random.randn(1000) * (1 if i % 2 == 0 else 50)).tolist()
+        for i in range(num_samples)
+    ]
+
+    # Uma única requisição para todas as amostras
+    print(f"\nEnviando {num_samples} amostras em uma requisição...")
+    try:
+        response = SESSION.post(
+            f"{API_URL}/predict-batch",
+            json={"samples": samples},
+            timeout=30,
+        )
+    except Exception as e:
+        print(f"❌ Erro ao fazer predição em lote: {e}")
+        return
+
+    if response.status_code != 200:
+        print(f"❌ Erro na requisição: {response.status_code}")
+        print(f"   Resposta: {response.text}")
+        return
+
+    results = response.json()["results"]
+    for i, result in enumerate(results):
+        label = "Normal" if i % 2 == 0 else "Potencialmente Anômalo"
+        print(
+            f"Amostra {i+1} ({label}): "
+            f"{'🔴 ANOMALIA' if result['is_anomaly'] else '🟢 NORMAL'} "
+            f"- Confiança: {result['confidence']:.2%}"
+        )
 
     # Resumo
     print("\n" + "=" * 60)
@@ -155,32 +171,40 @@ def example_5_performance_test():
     print("=" * 60)
 
     num_requests = 10
+    concurrency = 10
     features = np.random.randn(1000).tolist()
 
-    print(f"Fazendo {num_requests} requisições...")
-    start_time = time.time()
-
-    success_count = 0
-    for i in range(num_requests):
+    def send_request(i):
+        """Envia uma requisição e retorna (sucesso, latência)"""
+        start = time.time()
         try:
-            response = requests.post(
+            response = SESSION.post(
                 f"{API_URL}/predict",
                 json={"features": features},
-                headers={"Content-Type": "application/json"},
                 timeout=10,
             )
-            if response.status_code == 200:
-                success_count += 1
+            return response.status_code == 200, time.time() - start
         except Exception as e:
             print(f"Erro na requisição {i+1}: {e}")
+            return False, time.time() - start
+
+    # Requisições simultâneas medem a vazão do servidor, não apenas a latência
+    print(f"Fazendo {num_requests} requisições ({concurrency} simultâneas)...")
+    start_time = time.time()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(send_request, range(num_requests)))
 
     end_time = time.time()
     elapsed = end_time - start_time
 
+    success_count = sum(1 for ok, _ in outcomes if ok)
+    avg_latency = sum(latency for _, latency in outcomes) / num_requests
+
     print(f"\nResultados:")
     print(f"Requisições bem-sucedidas: {success_count}/{num_requests}")
     print(f"Tempo total: {elapsed:.2f} segundos")
-    print(f"Tempo médio por requisição: {elapsed/num_requests:.3f} segundos")
+    print(f"Tempo médio por requisição: {avg_latency:.3f} segundos")
     print(f"Throughput: {num_requests/elapsed:.2f} req/s")
 
 
@@ -2,6 +2,9 @@ import React, { useState, useEffect, useRef, useCallback } from 'react';
 import Chart from 'chart.js/auto';
 import './App.css';
 
+// Points kept on the real-time timeline chart
+const TIMELINE_POINTS = 20;
+
 function App() {
     const [totalDetections, setTotalDetections] = useState(0);
     const [anomaliesFound, setAnomaliesFound] = useState(0);
@@ -39,6 +42,8 @@ function App() {
             options: {
                 responsive: true,
                 maintainAspectRatio: false,
+                animation: false,
+                spanGaps: true,
                 plugins: {
                     legend: {
                         labels: {
@@ -156,11 +161,11 @@ function App() {
 
     const updateTimelineChart = useCallback((history) => {
         if (timelineChartInstance.current) {
-            const labels = history.map(d => new Date(d.timestamp).toLocaleTimeString()).reverse();
-            const scores = history.map(d => d.anomaly_score).reverse();
-            timelineChartInstance.current.data.labels = labels.slice(-20);
-            timelineChartInstance.current.data.datasets[0].data = scores.slice(-20);
-            timelineChartInstance.current.update();
+            // History is newest first; only the latest 20 points are plotted
+            const recent = history.slice(0, TIMELINE_POINTS).reverse();
+            timelineChartInstance.current.data.labels = recent.map(d => new Date(d.timestamp).toLocaleTimeString());
+            timelineChartInstance.current.data.datasets[0].data = recent.map(d => d.anomaly_score);
+            timelineChartInstance.current.update('none');
         }
     }, []);
 
@@ -194,17 +199,14 @@ function App() {
     };
 
     const generateSampleData = useCallback(async () => {
-        // Generate random features (assuming 1000 features as per backend)
-        const features = Array.from({ length: 1000 }, () => Math.random() * 2 - 1);
-
+        // The backend generates the random sample features itself
         try {
-            const response = await fetch(`${API_BASE_URL}/api/detect`, {
+            const response = await fetch(`${API_BASE_URL}/api/detect-random`, {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json'
                 },
                 body: JSON.stringify({
-                    features: features,
                     algorithm: algorithm
                 })
             });
@@ -1,20 +1,23 @@
 import os
+import hashlib
 import logging
+import threading
 from datetime import datetime
-from dataclasses import asdict
-import threading  # Adicionado para a função train_models
-import io
+import tempfile
+from functools import lru_cache
 
 import numpy as np
+import orjson
 import pandas as pd
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify, send_file, stream_with_context
 from flask_cors import CORS
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib import colors
 
-from src.services.anomaly_detector import AdvancedAnomalyDetector
+from src.api.json_provider import OrjsonProvider
+from src.services.anomaly_detector import (
+    AdvancedAnomalyDetector,
+    TrainingInProgressError,
+)
+from src.utils.timestamps import iso_now
 
 # Configure logging
 logging.basicConfig(
@@ -22,17 +25,82 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Initialize the advanced detector
-detector = AdvancedAnomalyDetector()
+# The advanced detector is built on first use. Training workers are spawned
+# and re-import the main script, so building it at import time would give
+# every worker its own detector, database connection and threads
+_detector = None
+_detector_lock = threading.Lock()
+
+
+def get_detector() -> AdvancedAnomalyDetector:
+    """The shared detector, built and warmed up on first call"""
+    global _detector
+    if _detector is None:
+        with _detector_lock:
+            if _detector is None:
+                detector = AdvancedAnomalyDetector()
+                detector.warmup()
+                _detector = detector
+    return _detector
+
 
 # Flask application
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 CORS(app)
 
 
+# reportlab is only imported on the first report export; the styles are
+# immutable, so they are built once and cached
+@lru_cache(maxsize=None)
+def _pdf_styles():
+    """Sample stylesheet for PDF reports"""
+    from reportlab.lib.styles import getSampleStyleSheet
+
+    return getSampleStyleSheet()
+
+
+@lru_cache(maxsize=None)
+def _report_table_style(header_font_size: int):
+    """Table style shared by the report tables"""
+    from reportlab.lib import colors
+    from reportlab.platypus import TableStyle
+
+    return TableStyle(
+        [
+            ("BACKGROUND", (0, 0), (-1, 0), colors.grey),
+            ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
+            ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+            ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+            ("FONTSIZE", (0, 0), (-1, 0), header_font_size),
+            ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
+            ("BACKGROUND", (0, 1), (-1, -1), colors.beige),
+            ("GRID", (0, 0), (-1, -1), 1, colors.black),
+        ]
+    )
+
+
+def _digest_etag(*parts) -> str:
+    """Short content hash for use as an ETag"""
+    return hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+
+
+def _include_features() -> bool:
+    """Whether the client asked for feature vectors with ?include_features"""
+    return request.args.get("include_features", "").lower() in ("1", "true", "yes")
+
+
+def _not_modified(etag: str) -> Response:
+    """Empty 304 response for a client that already has this ETag"""
+    response = Response(status=304)
+    response.set_etag(etag)
+    return response
+
+
 @app.route("/api/detect", methods=["POST"])
 def detect_anomaly():
     """Advanced anomaly detection endpoint"""
+    detector = get_detector()
     try:
         data = request.get_json()
 
@@ -42,34 +110,121 @@ def detect_anomaly():
                 400,
             )
 
-        features = data["features"]
+        # Convert once here; the detector and models work in float32
+        features = np.asarray(data["features"], dtype=np.float32)
         algorithm = data.get("algorithm")
 
         # Detect anomaly
         result = detector.detect_anomaly(features, algorithm)
 
+        return jsonify(dict(result.to_dict(), status="success"))
+
+    except Exception as e:
+        logger.error(f"Detection error: {str(e)}")
+        return jsonify({"error": str(e), "status": "error"}), 500
+
+
+@app.route("/api/detect-random", methods=["POST"])
+def detect_random():
+    """Detect on server-generated sample features (dashboard demo)"""
+    detector = get_detector()
+    try:
+        data = request.get_json(silent=True) or {}
+
+        features = (
+            np.random.default_rng()
+            .uniform(-1.0, 1.0, detector.feature_count)
+            .astype(np.float32)
+        )
+        result = detector.detect_anomaly(features, data.get("algorithm"))
+
+        return jsonify(dict(result.to_dict(), status="success"))
+
+    except Exception as e:
+        logger.error(f"Detection error: {str(e)}")
+        return jsonify({"error": str(e), "status": "error"}), 500
+
+
+@app.route("/api/detect-batch", methods=["POST"])
+def detect_anomaly_batch():
+    """Vectorized anomaly detection for a JSON list of samples"""
+    detector = get_detector()
+    try:
+        data = request.get_json()
+
+        if not data or "samples" not in data:
+            return (
+                jsonify({"error": "Missing samples in request", "status": "error"}),
+                400,
+            )
+
+        try:
+            results = detector.detect_anomaly_batch(
+                data["samples"], data.get("algorithm")
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e), "status": "error"}), 400
+
         return jsonify(
             {
                 "status": "success",
-                "timestamp": result.timestamp.isoformat(),
-                "algorithm": result.algorithm,
-                "is_anomaly": result.is_anomaly,
-                "confidence": result.confidence,
-                "anomaly_score": result.anomaly_score,
-                "alert_level": result.alert_level.value,
-                "description": result.description,
+                "total_processed": len(results),
+                "anomalies_found": sum(1 for r in results if r.is_anomaly),
+                "results": [r.to_dict() for r in results],
             }
         )
 
     except Exception as e:
-        logger.error(f"Detection error: {str(e)}")
+        logger.error(f"Batch detection error: {str(e)}")
         return jsonify({"error": str(e), "status": "error"}), 500
 
 
+# Uploads are parsed and scored this many rows at a time
+BATCH_CHUNK_ROWS = 50_000
+# Larger uploads are rejected before any parsing
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_MB", "100")) * 1024 * 1024
+
+
+def _iter_csv_matrices(file):
+    """Parse an uploaded CSV as float32 matrices of at most BATCH_CHUNK_ROWS rows"""
+    with pd.read_csv(file, dtype=np.float32, chunksize=BATCH_CHUNK_ROWS) as reader:
+        for chunk in reader:
+            yield chunk.to_numpy()
+
+
+class RecordKeysError(ValueError):
+    """Raised when JSON records do not all share the same keys"""
+
+
+def _read_json_matrix(file) -> np.ndarray:
+    """Parse an uploaded JSON list of rows as float32, skipping pandas"""
+    data = orjson.loads(file.read())
+    if isinstance(data, list):
+        if data and isinstance(data[0], dict):
+            # Records are matched by key, in the first record's column order
+            columns = list(data[0])
+            keys = set(columns)
+            rows = []
+            for i, record in enumerate(data):
+                if not isinstance(record, dict) or record.keys() != keys:
+                    raise RecordKeysError(
+                        f"Record {i} does not have the same keys as record 0"
+                    )
+                rows.append([record[c] for c in columns])
+            return np.asarray(rows, dtype=np.float32)
+        return np.asarray(data, dtype=np.float32)
+    # Column-oriented documents, as written by DataFrame.to_json()
+    return pd.DataFrame(data).to_numpy(dtype=np.float32)
+
+
 @app.route("/api/batch-detect", methods=["POST"])
 def batch_detect():
     """Batch anomaly detection for file uploads"""
+    detector = get_detector()
     try:
+        if request.content_length and request.content_length > MAX_UPLOAD_BYTES:
+            return jsonify({"error": "File too large"}), 413
+
         if "file" not in request.files:
             return jsonify({"error": "No file uploaded"}), 400
 
@@ -77,28 +232,38 @@ def batch_detect():
         if file.filename == "":
             return jsonify({"error": "No file selected"}), 400
 
-        # Read file content
-        if file.filename.endswith(".csv"):
-            df = pd.read_csv(file)
-        elif file.filename.endswith(".json"):
-            df = pd.read_json(file)
-        else:
+        if not file.filename.endswith((".csv", ".json")):
             return jsonify({"error": "Unsupported file format"}), 400
 
-        # Process each row
+        # Parse straight into float32 and score one vectorized chunk at a
+        # time; files with the wrong number of columns have no usable rows
         results = []
-        for _, row in df.iterrows():
-            features = row.values.tolist()
-            if len(features) == detector.feature_count:
-                result = detector.detect_anomaly(features)
-                results.append(asdict(result))
+        try:
+            if file.filename.endswith(".csv"):
+                chunks = _iter_csv_matrices(file)
+            else:
+                chunks = iter([_read_json_matrix(file)])
+
+            for X in chunks:
+                if X.ndim != 2 or X.shape[1] != detector.feature_count:
+                    break
+                if len(X):
+                    results.extend(detector.detect_anomaly_batch(X))
+        except RecordKeysError as e:
+            return jsonify({"error": str(e)}), 400
+        except (ValueError, TypeError):
+            return jsonify({"error": "File contains non-numeric values"}), 400
 
         return jsonify(
             {
                 "status": "success",
                 "total_processed": len(results),
-                "anomalies_found": sum(1 for r in results if r["is_anomaly"]),
-                "results": results,
+                "anomalies_found": sum(1 for r in results if r.is_anomaly),
+                "results": (
+                    [dict(r.to_dict(), features=r.features) for r in results]
+                    if _include_features()
+                    else [r.to_dict() for r in results]
+                ),
             }
         )
 
@@ -110,28 +275,32 @@ def batch_detect():
 @app.route("/api/train", methods=["POST"])
 def train_models():
     """Train models with new data"""
+    detector = get_detector()
     try:
         data = request.get_json()
 
         if not data or "training_data" not in data:
             return jsonify({"error": "Missing training data"}), 400
 
-        training_data = np.array(data["training_data"])
+        training_data = np.asarray(data["training_data"], dtype=np.float32)
         algorithm = data.get("algorithm")
 
-        # Start training in background thread
-        def train_async():
-            detector.train_models(training_data, algorithm)
-
-        thread = threading.Thread(target=train_async)
-        thread.start()
-
-        return jsonify(
-            {
-                "status": "success",
-                "message": "Training started",
-                "training_samples": len(training_data),
-            }
+        # Training runs in a separate worker process, one job at a time
+        try:
+            job_id = detector.start_training(training_data, algorithm)
+        except TrainingInProgressError as e:
+            return jsonify({"error": str(e)}), 409
+
+        return (
+            jsonify(
+                {
+                    "status": "success",
+                    "message": "Training started",
+                    "job_id": job_id,
+                    "training_samples": len(training_data),
+                }
+            ),
+            202,
         )
 
     except Exception as e:
@@ -142,32 +311,98 @@ def train_models():
 @app.route("/api/training-progress")
 def get_training_progress():
     """Get training progress"""
-    return jsonify(
-        {"is_training": detector.is_training, "progress": detector.training_progress}
-    )
+    detector = get_detector()
+    progress = {
+        "is_training": detector.is_training,
+        "progress": detector.training_progress,
+    }
+
+    job_id = request.args.get("job_id")
+    if job_id:
+        job_status = detector.training_job_status(job_id)
+        if job_status is None:
+            return jsonify({"error": "Unknown training job"}), 404
+        progress["job_status"] = job_status
+
+    return jsonify(progress)
 
 
 @app.route("/api/metrics")
 def get_metrics():
     """Get model performance metrics"""
+    detector = get_detector()
     try:
+        # Metrics only change when the models do; skip recomputing them
+        etag = f"metrics-{detector.model_version}"
+        if request.if_none_match.contains(etag):
+            return _not_modified(etag)
+
         metrics = detector.get_model_metrics()
-        return jsonify([asdict(m) for m in metrics])
+        response = jsonify([m.to_dict() for m in metrics])
+        response.set_etag(etag)
+        return response
     except Exception as e:
         logger.error(f"Metrics error: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
 
+def _history_json_stream(rows):
+    """Yield {"status", "history", "total"} as JSON, one row at a time"""
+    yield b'{"status":"success","history":['
+    total = 0
+    for row in rows:
+        if total:
+            yield b","
+        yield orjson.dumps(row, option=orjson.OPT_SERIALIZE_NUMPY)
+        total += 1
+    yield b'],"total":' + str(total).encode() + b"}"
+
+
 @app.route("/api/history")
 def get_history():
     """Get anomaly detection history"""
+    detector = get_detector()
     try:
         limit = request.args.get("limit", 100, type=int)
+        offset = request.args.get("offset", 0, type=int)
         algorithm = request.args.get("algorithm")
+        ndjson = request.args.get("format") == "ndjson"
+        include_features = _include_features()
+
+        # The page can only change when anomalies are added
+        etag = _digest_etag(
+            "history",
+            detector.db_manager.anomalies_version(),
+            limit,
+            offset,
+            algorithm,
+            ndjson,
+            include_features,
+        )
+        if request.if_none_match.contains(etag):
+            return _not_modified(etag)
 
-        history = detector.db_manager.get_anomalies(limit, algorithm)
+        # Rows are streamed from the database cursor as they are serialized,
+        # either one JSON object per line or as one JSON document
+        rows = detector.db_manager.iter_anomalies(
+            limit, algorithm, offset, include_features
+        )
+        if ndjson:
+            response = Response(
+                stream_with_context(
+                    orjson.dumps(row, option=orjson.OPT_SERIALIZE_NUMPY) + b"\n"
+                    for row in rows
+                ),
+                mimetype="application/x-ndjson",
+            )
+        else:
+            response = Response(
+                stream_with_context(_history_json_stream(rows)),
+                mimetype="application/json",
+            )
 
-        return jsonify({"status": "success", "total": len(history), "history": history})
+        response.set_etag(etag)
+        return response
 
     except Exception as e:
         logger.error(f"History error: {str(e)}")
@@ -177,15 +412,20 @@ def get_history():
 @app.route("/api/export-report", methods=["POST"])
 def export_report():
     """Export detailed PDF report"""
+    detector = get_detector()
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table
+
     try:
         # Get recent anomalies
-        anomalies = detector.db_manager.get_anomalies(50)
+        anomalies = detector.db_manager.get_anomalies(50, include_features=False)
         metrics = detector.get_model_metrics()
 
-        # Create PDF report
-        buffer = io.BytesIO()
+        # Render into a spooled file: small reports stay in memory, large ones
+        # spill to disk, and send_file streams it back in chunks
+        buffer = tempfile.SpooledTemporaryFile(max_size=1 << 20)
         doc = SimpleDocTemplate(buffer, pagesize=letter)
-        styles = getSampleStyleSheet()
+        styles = _pdf_styles()
         story = []
 
         # Title
@@ -209,33 +449,19 @@ def export_report():
         if metrics:
             metrics_data = [
                 ["Algorithm", "Precision", "Recall", "F1-Score", "Accuracy"]
+            ] + [
+                [
+                    m.algorithm,
+                    f"{m.precision:.3f}",
+                    f"{m.recall:.3f}",
+                    f"{m.f1_score:.3f}",
+                    f"{m.accuracy:.3f}",
+                ]
+                for m in metrics
             ]
-            for m in metrics:
-                metrics_data.append(
-                    [
-                        m.algorithm,
-                        f"{m.precision:.3f}",
-                        f"{m.recall:.3f}",
-                        f"{m.f1_score:.3f}",
-                        f"{m.accuracy:.3f}",
-                    ]
-                )
 
             metrics_table = Table(metrics_data)
-            metrics_table.setStyle(
-                TableStyle(
-                    [
-                        ("BACKGROUND", (0, 0), (-1, 0), colors.grey),
-                        ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
-                        ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-                        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                        ("FONTSIZE", (0, 0), (-1, 0), 14),
-                        ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
-                        ("BACKGROUND", (0, 1), (-1, -1), colors.beige),
-                        ("GRID", (0, 0), (-1, -1), 1, colors.black),
-                    ]
-                )
-            )
+            metrics_table.setStyle(_report_table_style(14))
 
             story.append(Paragraph("Model Performance Metrics", styles["Heading2"]))
             story.append(metrics_table)
@@ -247,34 +473,19 @@ def export_report():
 
             anomaly_data = [
                 ["Timestamp", "Algorithm", "Status", "Confidence", "Alert Level"]
+            ] + [
+                [
+                    a["timestamp"][:19],  # Remove microseconds
+                    a["algorithm"],
+                    "Anomaly" if a["is_anomaly"] else "Normal",
+                    f"{a['confidence']:.3f}",
+                    a["alert_level"],
+                ]
+                for a in anomalies[:20]  # Show only first 20
             ]
-            for a in anomalies[:20]:  # Show only first 20
-                status = "Anomaly" if a["is_anomaly"] else "Normal"
-                anomaly_data.append(
-                    [
-                        a["timestamp"][:19],  # Remove microseconds
-                        a["algorithm"],
-                        status,
-                        f"{a['confidence']:.3f}",
-                        a["alert_level"],
-                    ]
-                )
 
             anomaly_table = Table(anomaly_data)
-            anomaly_table.setStyle(
-                TableStyle(
-                    [
-                        ("BACKGROUND", (0, 0), (-1, 0), colors.grey),
-                        ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
-                        ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-                        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                        ("FONTSIZE", (0, 0), (-1, 0), 12),
-                        ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
-                        ("BACKGROUND", (0, 1), (-1, -1), colors.beige),
-                        ("GRID", (0, 0), (-1, -1), 1, colors.black),
-                    ]
-                )
-            )
+            anomaly_table.setStyle(_report_table_style(12))
 
             story.append(anomaly_table)
 
@@ -297,9 +508,34 @@ def export_report():
 @app.route("/api/feedback", methods=["POST"])
 def submit_feedback():
     """Submit feedback for anomaly detection"""
+    detector = get_detector()
     try:
         data = request.get_json()
 
+        # Several items may be submitted at once as {"feedback": [...]}
+        items = data.get("feedback") if isinstance(data, dict) else None
+        if isinstance(items, list):
+            if not items or not all(
+                isinstance(item, dict)
+                and "anomaly_id" in item
+                and "feedback_type" in item
+                for item in items
+            ):
+                return jsonify({"error": "Missing required fields"}), 400
+
+            detector.db_manager.save_feedback_many(
+                [
+                    (item["anomaly_id"], item["feedback_type"], item.get("comment", ""))
+                    for item in items
+                ]
+            )
+            return jsonify(
+                {
+                    "status": "success",
+                    "message": f"{len(items)} feedback items submitted successfully",
+                }
+            )
+
         if not data or "anomaly_id" not in data or "feedback_type" not in data:
             return jsonify({"error": "Missing required fields"}), 400
 
@@ -320,20 +556,29 @@ def submit_feedback():
 @app.route("/api/status")
 def status():
     """Enhanced API status endpoint"""
-    return jsonify(
-        {
-            "status": "healthy",
-            "version": "1.0.0",
-            "algorithms_available": list(detector.models.keys()),
-            "features_expected": detector.feature_count,
-            "is_training": detector.is_training,
-            "training_progress": detector.training_progress,
-            "database_connected": os.path.exists(detector.db_manager.db_path),
-            "total_detections": len(detector.db_manager.get_anomalies(1000)),
-            "author": "Gabriel Demetrios Lafis",
-            "timestamp": datetime.now().isoformat(),
-        }
-    )
+    detector = get_detector()
+    payload = {
+        "status": "healthy",
+        "version": "1.0.0",
+        "algorithms_available": list(detector.models.keys()),
+        "features_expected": detector.feature_count,
+        "is_training": detector.is_training,
+        "training_progress": detector.training_progress,
+        "database_connected": os.path.exists(detector.db_manager.db_path),
+        "total_detections": detector.db_manager.count_anomalies(),
+        "detection_cache": detector.cache_stats(),
+        "author": "Gabriel Demetrios Lafis",
+    }
+
+    # The timestamp is left out of the ETag so unchanged status polls get 304
+    etag = _digest_etag(orjson.dumps(payload, option=orjson.OPT_SORT_KEYS))
+    if request.if_none_match.contains(etag):
+        return _not_modified(etag)
+
+    payload["timestamp"] = iso_now()
+    response = jsonify(payload)
+    response.set_etag(etag)
+    return response
 
 
 @app.errorhandler(404)
@@ -346,6 +591,8 @@ def not_found(error):
                 "status": "error",
                 "available_endpoints": [
                     "/api/detect",
+                    "/api/detect-random",
+                    "/api/detect-batch",
                     "/api/batch-detect",
                     "/api/train",
                     "/api/training-progress",
@@ -362,4 +609,11 @@ def not_found(error):
 
 
 if __name__ == "__main__":
-    app.run(debug=True, host="0.0.0.0", port=5000)
+    # Development server only; production runs wsgi:app under gunicorn
+    get_detector()
+    app.run(
+        debug=os.getenv("FLASK_DEBUG") == "1",
+        host="0.0.0.0",
+        port=5000,
+        threaded=True,
+    )
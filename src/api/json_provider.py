@@ -0,0 +1,41 @@
+import orjson
+from flask.json.provider import DefaultJSONProvider
+
+# Dates are passed through to Flask's default handler so responses keep
+# Flask's HTTP-date format; numpy scalars and arrays serialize natively
+_ORJSON_OPTIONS = (
+    orjson.OPT_SERIALIZE_NUMPY
+    | orjson.OPT_PASSTHROUGH_DATETIME
+    | orjson.OPT_NON_STR_KEYS
+)
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson for requests and responses"""
+
+    def dumps(self, obj, **kwargs) -> str:
+        """Serialize obj to a JSON string"""
+        return self._dumps(obj, pretty="indent" in kwargs).decode()
+
+    def loads(self, s, **kwargs):
+        """Parse JSON from str or bytes"""
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        """Build a JSON response without a str round trip"""
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = (self.compact is None and self._app.debug) or self.compact is False
+
+        return self._app.response_class(
+            self._dumps(obj, pretty) + b"\n", mimetype=self.mimetype
+        )
+
+    def _dumps(self, obj, pretty: bool = False) -> bytes:
+        """Serialize obj to JSON bytes"""
+        option = _ORJSON_OPTIONS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+
+        return orjson.dumps(obj, default=self.default, option=option)
@@ -3,6 +3,7 @@ from datetime import datetime
 
 from flask import Flask, request, jsonify
 
+from src.api.json_provider import OrjsonProvider
 from src.services.simple_anomaly_detector import AnomalyDetector
 
 # Configure logging
@@ -10,6 +11,7 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 
 # Initialize the anomaly detector
 detector = AnomalyDetector()
@@ -56,6 +58,49 @@ def predict():
         return jsonify({"error": "Internal server error", "status": "error"}), 500
 
 
+@app.route("/predict-batch", methods=["POST"])
+def predict_batch():
+    """
+    Batch anomaly detection endpoint
+
+    Expected JSON payload:
+    {
+        "samples": [[1000 numerical values], [1000 numerical values], ...]
+    }
+    """
+    try:
+        data = request.get_json()
+
+        if not data:
+            return jsonify({"error": "No JSON data provided", "status": "error"}), 400
+
+        if "samples" not in data:
+            return (
+                jsonify(
+                    {"error": 'Missing "samples" field in request', "status": "error"}
+                ),
+                400,
+            )
+
+        results = detector.predict_batch(data["samples"])
+
+        return jsonify(
+            {
+                "status": "success",
+                "total_processed": len(results),
+                "anomalies_found": sum(1 for r in results if r["is_anomaly"]),
+                "results": results,
+            }
+        )
+
+    except ValueError as e:
+        return jsonify({"error": str(e), "status": "error"}), 400
+
+    except Exception as e:
+        logger.error(f"Batch prediction endpoint error: {str(e)}")
+        return jsonify({"error": "Internal server error", "status": "error"}), 500
+
+
 @app.route("/api/status")
 def status():
     """API health check endpoint"""
@@ -78,7 +123,7 @@ def not_found(error):
             {
                 "error": "Endpoint not found",
                 "status": "error",
-                "available_endpoints": ["/predict", "/api/status"],
+                "available_endpoints": ["/predict", "/predict-batch", "/api/status"],
             }
         ),
         404,
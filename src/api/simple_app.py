@@ -6,129 +6,38 @@ Author: Gabriel Demetrios Lafis
 """
 
 import os
-import pickle
+import sys
+import gzip
+import hashlib
 import logging
-from datetime import datetime
-from typing import List, Dict, Any
+from typing import Dict, Any
 
+import msgpack
 import numpy as np
-from flask import Flask, request, jsonify, render_template_string
+import orjson
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 
+try:
+    from src.api.json_provider import OrjsonProvider
+    from src.services.simple_anomaly_detector import AnomalyDetector
+    from src.utils.timestamps import iso_now
+except ImportError:  # run directly as python src/api/simple_app.py
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+    from src.api.json_provider import OrjsonProvider
+    from src.services.simple_anomaly_detector import AnomalyDetector
+    from src.utils.timestamps import iso_now
+
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 CORS(app)
 
 
-class AnomalyDetector:
-    """
-    Anomaly Detection System using RandomForest regression model
-    """
-
-    def __init__(self, model_path: str = "regressor_model.pkl"):
-        self.model = None
-        self.model_path = model_path
-        self.feature_count = 1000  # Expected number of features
-        self.load_model()
-
-    def load_model(self):
-        """Load the pre-trained model"""
-        try:
-            if os.path.exists(self.model_path):
-                with open(self.model_path, "rb") as f:
-                    self.model = pickle.load(f)
-                logger.info(f"Model loaded successfully from {self.model_path}")
-            else:
-                logger.warning(
-                    f"Model file {self.model_path} not found. Creating mock model."
-                )
-                self.create_mock_model()
-        except Exception as e:
-            logger.error(f"Error loading model: {str(e)}")
-            self.create_mock_model()
-
-    def create_mock_model(self):
-        """Create a mock model for demonstration purposes"""
-        from sklearn.ensemble import RandomForestRegressor
-
-        # Create a simple mock model
-        self.model = RandomForestRegressor(n_estimators=10, random_state=42)
-
-        # Generate some dummy training data
-        X_dummy = np.random.randn(100, self.feature_count)
-        y_dummy = np.random.randn(100)
-
-        # Train the mock model
-        self.model.fit(X_dummy, y_dummy)
-
-        # Save the mock model
-        with open(self.model_path, "wb") as f:
-            pickle.dump(self.model, f)
-
-        logger.info("Mock model created and saved successfully")
-
-    def validate_features(self, features: List[float]) -> bool:
-        """Validate input features"""
-        if not isinstance(features, list):
-            return False
-
-        if len(features) != self.feature_count:
-            return False
-
-        # Check if all features are numeric
-        try:
-            [float(f) for f in features]
-            return True
-        except (ValueError, TypeError):
-            return False
-
-    def predict(self, features: List[float]) -> Dict[str, Any]:
-        """
-        Make prediction using the loaded model
-
-        Args:
-            features: List of numerical features
-
-        Returns:
-            Dictionary containing prediction and metadata
-        """
-        if not self.validate_features(features):
-            raise ValueError(
-                f"Invalid features. Expected {self.feature_count} numerical values."
-            )
-
-        if self.model is None:
-            raise RuntimeError("Model not loaded")
-
-        try:
-            # Convert to numpy array and reshape for prediction
-            X = np.array(features).reshape(1, -1)
-
-            # Make prediction
-            prediction = self.model.predict(X)[0]
-
-            # Calculate confidence (simplified approach)
-            confidence = min(abs(prediction) / 100.0, 1.0)
-
-            # Determine if it's an anomaly (simplified threshold)
-            is_anomaly = bool(abs(prediction) > 50.0)
-
-            return {
-                "prediction": float(prediction),
-                "is_anomaly": is_anomaly,
-                "confidence": float(confidence),
-                "timestamp": datetime.now().isoformat(),
-                "feature_count": len(features),
-            }
-
-        except Exception as e:
-            logger.error(f"Prediction error: {str(e)}")
-            raise RuntimeError(f"Prediction failed: {str(e)}")
-
-
 # Initialize the anomaly detector
 detector = AnomalyDetector()
 
@@ -227,6 +136,11 @@ HTML_TEMPLATE = """
                 Performs anomaly detection on provided features
             </div>
 
+            <div class="endpoint">
+                <span class="method">POST</span> <span class="url">/predict-batch</span><br>
+                Performs anomaly detection on many samples in one request
+            </div>
+
             <div class="endpoint">
                 <span class="method">GET</span> <span class="url">/api/status</span><br>
                 Returns API health status
@@ -264,10 +178,26 @@ HTML_TEMPLATE = """
 """
 
 
+# The page is static, so render and gzip it once and serve it with an ETag
+_INDEX_HTML = app.jinja_env.from_string(HTML_TEMPLATE).render().encode()
+_INDEX_HTML_GZIP = gzip.compress(_INDEX_HTML, compresslevel=9, mtime=0)
+_INDEX_ETAG = hashlib.md5(_INDEX_HTML).hexdigest()
+
+
 @app.route("/")
 def index():
     """Serve the web interface"""
-    return render_template_string(HTML_TEMPLATE)
+    if "gzip" in request.accept_encodings:
+        response = Response(_INDEX_HTML_GZIP, mimetype="text/html")
+        response.content_encoding = "gzip"
+        response.set_etag(f"{_INDEX_ETAG}-gzip")
+    else:
+        response = Response(_INDEX_HTML, mimetype="text/html")
+        response.set_etag(_INDEX_ETAG)
+    response.vary.add("Accept-Encoding")
+    response.cache_control.public = True
+    response.cache_control.max_age = 300
+    return response.make_conditional(request)
 
 
 @app.route("/predict", methods=["POST"])
@@ -311,24 +241,139 @@ def predict():
         return jsonify({"error": "Internal server error", "status": "error"}), 500
 
 
+@app.route("/predict-batch", methods=["POST"])
+def predict_batch():
+    """
+    Batch anomaly detection endpoint
+
+    Expected JSON payload:
+    {
+        "samples": [[1000 numerical values], [1000 numerical values], ...]
+    }
+    """
+    try:
+        data = request.get_json(force=True, silent=True)
+
+        if not data:
+            return jsonify({"error": "No JSON data provided", "status": "error"}), 400
+
+        if "samples" not in data:
+            return (
+                jsonify(
+                    {"error": 'Missing "samples" field in request', "status": "error"}
+                ),
+                400,
+            )
+
+        results = detector.predict_batch(data["samples"])
+
+        return jsonify(
+            {
+                "status": "success",
+                "total_processed": len(results),
+                "anomalies_found": sum(1 for r in results if r["is_anomaly"]),
+                "results": results,
+            }
+        )
+
+    except ValueError as e:
+        return jsonify({"error": str(e), "status": "error"}), 400
+
+    except Exception as e:
+        logger.error(f"Batch prediction endpoint error: {str(e)}")
+        return jsonify({"error": "Internal server error", "status": "error"}), 500
+
+
+def _msgpack_response(payload: Dict[str, Any], status: int = 200) -> Response:
+    """Build an application/msgpack response"""
+    return Response(
+        msgpack.packb(payload), status=status, mimetype="application/msgpack"
+    )
+
+
+@app.route("/predict-msgpack", methods=["POST"])
+def predict_msgpack():
+    """
+    Binary anomaly detection endpoint for server-to-server callers
+
+    Expected msgpack payload:
+    {
+        "features": [1000 numerical values] or 4000 bytes of little-endian float32
+    }
+    """
+    try:
+        try:
+            data = msgpack.unpackb(request.get_data(), raw=False)
+        except Exception:
+            data = None
+
+        if not isinstance(data, dict):
+            return _msgpack_response(
+                {"error": "No msgpack map provided", "status": "error"}, 400
+            )
+
+        if "features" not in data:
+            return _msgpack_response(
+                {"error": 'Missing "features" field in request', "status": "error"},
+                400,
+            )
+
+        features = data["features"]
+        if isinstance(features, bytes):
+            if len(features) != detector.feature_count * 4:
+                raise ValueError(
+                    f"Invalid features. Expected {detector.feature_count} "
+                    f"little-endian float32 values."
+                )
+            result = detector.predict_array(np.frombuffer(features, dtype="<f4"))
+        else:
+            result = detector.predict(features)
+        result["status"] = "success"
+
+        return _msgpack_response(result)
+
+    except ValueError as e:
+        return _msgpack_response({"error": str(e), "status": "error"}, 400)
+
+    except Exception as e:
+        logger.error(f"Msgpack prediction endpoint error: {str(e)}")
+        return _msgpack_response(
+            {"error": "Internal server error", "status": "error"}, 500
+        )
+
+
+# Status bodies only change with the second-resolution timestamp or the
+# model state, so each distinct body is serialized once and reused
+_status_cache = (None, b"")
+
+
 @app.route("/api/status")
 def status():
     """API health check endpoint"""
-    return jsonify(
-        {
-            "status": "healthy",
-            "version": "1.0.0",
-            "model_loaded": detector.model is not None,
-            "timestamp": datetime.now().isoformat(),
-            "author": "Gabriel Demetrios Lafis",
-        }
-    )
+    global _status_cache
+    key = (iso_now(), detector.model is not None)
+    cached_key, body = _status_cache
+    if key != cached_key:
+        timestamp, model_loaded = key
+        body = (
+            orjson.dumps(
+                {
+                    "status": "healthy",
+                    "version": "1.0.0",
+                    "model_loaded": model_loaded,
+                    "timestamp": timestamp,
+                    "author": "Gabriel Demetrios Lafis",
+                }
+            )
+            + b"\n"
+        )
+        _status_cache = (key, body)
+    return Response(body, mimetype="application/json")
 
 
-@app.route("/api/info")
-def info():
-    """System information endpoint"""
-    return jsonify(
+# The info payload is static, so it is serialized once at import
+_INFO_BODY = (
+    orjson.dumps(
         {
             "project": "Anomaly Detection System",
             "description": "Real-time anomaly detection using RandomForest regression model",
@@ -347,6 +392,16 @@ def info():
                     "path": "/predict",
                     "description": "Anomaly detection",
                 },
+                {
+                    "method": "POST",
+                    "path": "/predict-batch",
+                    "description": "Batch anomaly detection",
+                },
+                {
+                    "method": "POST",
+                    "path": "/predict-msgpack",
+                    "description": "Anomaly detection over msgpack",
+                },
                 {"method": "GET", "path": "/api/status", "description": "Health check"},
                 {
                     "method": "GET",
@@ -356,6 +411,14 @@ def info():
             ],
         }
     )
+    + b"\n"
+)
+
+
+@app.route("/api/info")
+def info():
+    """System information endpoint"""
+    return Response(_INFO_BODY, mimetype="application/json")
 
 
 @app.errorhandler(404)
@@ -366,7 +429,13 @@ def not_found(error):
             {
                 "error": "Endpoint not found",
                 "status": "error",
-                "available_endpoints": ["/predict", "/api/status", "/api/info"],
+                "available_endpoints": [
+                    "/predict",
+                    "/predict-batch",
+                    "/predict-msgpack",
+                    "/api/status",
+                    "/api/info",
+                ],
             }
         ),
         404,
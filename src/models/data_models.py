@@ -1,7 +1,13 @@
 from datetime import datetime
-from typing import List
 from dataclasses import dataclass
 from enum import Enum
+from functools import lru_cache
+
+import numpy as np
+
+# Batch results share one datetime object, so remembering the last
+# conversion formats it once per batch instead of once per row
+format_timestamp = lru_cache(maxsize=1)(datetime.isoformat)
 
 
 class AlgorithmType(Enum):
@@ -31,10 +37,23 @@ class AnomalyResult:
     is_anomaly: bool
     confidence: float
     anomaly_score: float
-    features: List[float]
+    # float32 vector; stored as a contiguous array rather than boxed floats
+    features: np.ndarray
     alert_level: AlertLevel
     description: str
 
+    def to_dict(self) -> dict:
+        """JSON-ready dict of the result, without the feature vector"""
+        return {
+            "timestamp": format_timestamp(self.timestamp),
+            "algorithm": self.algorithm,
+            "is_anomaly": self.is_anomaly,
+            "confidence": self.confidence,
+            "anomaly_score": self.anomaly_score,
+            "alert_level": self.alert_level.value,
+            "description": self.description,
+        }
+
 
 @dataclass
 class ModelMetrics:
@@ -48,3 +67,16 @@ class ModelMetrics:
     training_time: float
     prediction_time: float
     last_updated: datetime
+
+    def to_dict(self) -> dict:
+        """Plain dict of the metrics"""
+        return {
+            "algorithm": self.algorithm,
+            "precision": self.precision,
+            "recall": self.recall,
+            "f1_score": self.f1_score,
+            "accuracy": self.accuracy,
+            "training_time": self.training_time,
+            "prediction_time": self.prediction_time,
+            "last_updated": self.last_updated,
+        }
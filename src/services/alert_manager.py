@@ -1,8 +1,9 @@
 import os
+import time
+import queue
 import logging
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import threading
+from typing import List
 
 from src.models.data_models import AnomalyResult, AlertLevel
 
@@ -12,6 +13,11 @@ logger = logging.getLogger(__name__)
 class AlertManager:
     """Manages alert notifications"""
 
+    # Alerts arriving within this many seconds of each other share one email
+    DIGEST_WINDOW = 1.0
+    # An SMTP session idle for longer than this is checked with NOOP before use
+    SMTP_IDLE_CHECK = 300.0
+
     def __init__(self):
         self.email_config = {
             "smtp_server": os.getenv("SMTP_SERVER", "smtp.gmail.com"),
@@ -20,47 +26,133 @@ class AlertManager:
             "password": os.getenv("ALERT_EMAIL_PASSWORD"),
             "recipients": os.getenv("ALERT_RECIPIENTS", "").split(","),
         }
+        self._queue = queue.Queue(maxsize=1024)
+        self._smtp = None
+        self._smtp_last_used = 0.0
+        threading.Thread(
+            target=self._worker, name="alert-email-worker", daemon=True
+        ).start()
 
     def send_alert(self, result: AnomalyResult):
-        """Send alert notification"""
+        """Queue alert notification for the background sender"""
         if result.alert_level in [AlertLevel.HIGH, AlertLevel.CRITICAL]:
-            self._send_email_alert(result)
-            logger.info(f"Alert sent for {result.alert_level.value} anomaly")
+            try:
+                self._queue.put_nowait(result)
+            except queue.Full:
+                logger.warning(
+                    f"Alert queue full, dropping {result.alert_level.value} alert"
+                )
+
+    def _worker(self):
+        """Drain the alert queue, batching bursts into digest emails"""
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.DIGEST_WINDOW
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            self._send_email_alert(batch)
 
-    def _send_email_alert(self, result: AnomalyResult):
+    def _send_email_alert(self, results: List[AnomalyResult]):
         """Send email alert"""
+        # smtplib/email are only needed once an alert actually goes out
+        import smtplib
+        from email.message import EmailMessage
+
         if not self.email_config["email"] or not self.email_config["recipients"][0]:
             logger.warning("Email configuration not set, skipping email alert")
             return
 
         try:
-            msg = MIMEMultipart()
+            msg = EmailMessage()
             msg["From"] = self.email_config["email"]
             msg["To"] = ", ".join(self.email_config["recipients"])
-            msg["Subject"] = f"Anomaly Alert - {result.alert_level.value.upper()}"
 
-            body = f"""
-            Anomaly Detected!
-
-            Algorithm: {result.algorithm}
-            Confidence: {result.confidence:.2%}
-            Anomaly Score: {result.anomaly_score:.4f}
-            Alert Level: {result.alert_level.value.upper()}
-            Timestamp: {result.timestamp}
-            Description: {result.description}
+            if len(results) == 1:
+                level = results[0].alert_level.value.upper()
+                msg["Subject"] = f"Anomaly Alert - {level}"
+            else:
+                levels = {r.alert_level for r in results}
+                level = (
+                    AlertLevel.CRITICAL
+                    if AlertLevel.CRITICAL in levels
+                    else AlertLevel.HIGH
+                ).value.upper()
+                msg["Subject"] = f"Anomaly Alert Digest - {len(results)} x {level}"
 
+            body = "".join(self._format_alert(r) for r in results)
+            body += """
             Please review the anomaly detection dashboard for more details.
             """
 
-            msg.attach(MIMEText(body, "plain"))
+            msg.set_content(body)
+
+            try:
+                self._ensure_smtp().send_message(msg)
+            except smtplib.SMTPServerDisconnected:
+                # The server dropped an idle session; retry once on a fresh one
+                self._smtp = None
+                self._ensure_smtp().send_message(msg)
+            self._smtp_last_used = time.monotonic()
+
+            for r in results:
+                logger.info(f"Alert sent for {r.alert_level.value} anomaly")
+
+        except Exception as e:
+            logger.error(f"Failed to send email alert: {str(e)}")
+            self._close_smtp()
 
+    def _ensure_smtp(self):
+        """Return a live SMTP session, reconnecting if it has gone stale"""
+        import smtplib
+
+        if self._smtp is not None:
+            idle = time.monotonic() - self._smtp_last_used
+            if idle > self.SMTP_IDLE_CHECK:
+                try:
+                    if self._smtp.noop()[0] != 250:
+                        self._close_smtp()
+                except (smtplib.SMTPException, OSError):
+                    self._close_smtp()
+
+        if self._smtp is None:
             server = smtplib.SMTP(
                 self.email_config["smtp_server"], self.email_config["smtp_port"]
             )
             server.starttls()
             server.login(self.email_config["email"], self.email_config["password"])
-            server.send_message(msg)
-            server.quit()
+            self._smtp = server
+            self._smtp_last_used = time.monotonic()
 
-        except Exception as e:
-            logger.error(f"Failed to send email alert: {str(e)}")
+        return self._smtp
+
+    def _close_smtp(self):
+        """Drop the cached SMTP session"""
+        import smtplib
+
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._smtp = None
+
+    @staticmethod
+    def _format_alert(result: AnomalyResult) -> str:
+        """Format one anomaly for an alert email body"""
+        return f"""
+            Anomaly Detected!
+
+            Algorithm: {result.algorithm}
+            Confidence: {result.confidence:.2%}
+            Anomaly Score: {result.anomaly_score:.4f}
+            Alert Level: {result.alert_level.value.upper()}
+            Timestamp: {result.timestamp}
+            Description: {result.description}
+            """
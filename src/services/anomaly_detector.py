@@ -1,15 +1,44 @@
 import os
+import hashlib
 import logging
+import threading
 import time
+import uuid
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from dataclasses import dataclass, field, replace
 from datetime import datetime
-from typing import List
+from functools import lru_cache
+from typing import List, Optional
 
 import numpy as np
+
+# Intel's scikit-learn extension must patch sklearn before the estimators
+# are imported. It is opt-in: it does not cover the Nystroem/SGD pipeline
+# and has no isolation forest kernel, so it only helps on custom models
+if os.getenv("USE_SKLEARNEX", "0") == "1":
+    try:
+        from sklearnex import patch_sklearn
+
+        patch_sklearn()
+    except ImportError:  # scikit-learn-intelex is optional
+        pass
+
 from sklearn.ensemble import IsolationForest
-from sklearn.svm import OneClassSVM
+from sklearn.kernel_approximation import Nystroem
+from sklearn.linear_model import SGDOneClassSVM
+from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler
 import joblib
 
+try:
+    import xxhash
+except ImportError:  # xxhash is optional; fall back to blake2b
+    xxhash = None
+
 from src.models.data_models import (
     AlgorithmType,
     AlertLevel,
@@ -18,25 +47,323 @@ from src.models.data_models import (
 )
 from src.services.database_manager import DatabaseManager
 from src.services.alert_manager import AlertManager
+from src.utils.jit_kernels import (
+    forest_path_lengths,
+    forest_path_lengths_serial,
+    scale_row,
+    zscore_max,
+)
 
 logger = logging.getLogger(__name__)
 
+# Training workers are spawned rather than forked: the web process runs
+# threads (database flusher, alert sender) that must not be forked mid-lock
+_MP_CONTEXT = multiprocessing.get_context("spawn")
+
+# Worker threads for forest fitting and large-batch scoring; -1 uses every
+# core, which inside a CPU-limited container means every host core
+_N_JOBS = int(os.getenv("DETECTOR_N_JOBS", "-1"))
+
+
+def _feature_digest(X: np.ndarray) -> bytes:
+    """Content hash of a feature matrix, used as a detection cache key"""
+    if xxhash is not None:
+        return xxhash.xxh3_128_digest(X.tobytes())
+    return hashlib.blake2b(X.tobytes(), digest_size=16).digest()
+
+
+class TrainingInProgressError(RuntimeError):
+    """Raised when training is requested while another job is running"""
+
+
+@dataclass
+class InlineScaler:
+    """Fitted standardization constants loaded without unpickling sklearn.
+
+    Attribute names mirror a fitted StandardScaler so either can be used.
+    """
+
+    mean_: np.ndarray
+    scale_: np.ndarray
+
+    def transform(self, X: np.ndarray) -> np.ndarray:
+        return (np.asarray(X, dtype=np.float32) - self.mean_) / self.scale_
+
+
+@dataclass(frozen=True)
+class ModelState:
+    """Installed models, their scalers and the constants derived from them.
+
+    Installing models replaces the whole state with one assignment, and a
+    detection reads it once, so it never mixes old and new models.
+    """
+
+    models: dict
+    scalers: dict
+    version: str = field(default_factory=lambda: uuid.uuid4().hex)
+    # Float32 SVM scaler constants for inline scaling
+    svm_mean: Optional[np.ndarray] = None
+    svm_inv_scale: Optional[np.ndarray] = None
+    # Per-algorithm ModelMetrics, measured on first request
+    metrics: dict = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, models: dict, scalers: dict) -> "ModelState":
+        """State for these models, with the SVM scaling constants cached"""
+        scaler = scalers.get(AlgorithmType.ONE_CLASS_SVM.value)
+        if scaler is None:
+            return cls(models, scalers)
+        return cls(
+            models,
+            scalers,
+            svm_mean=scaler.mean_.astype(np.float32),
+            svm_inv_scale=(1.0 / scaler.scale_).astype(np.float32),
+        )
+
+
+def _build_iforest() -> IsolationForest:
+    """Isolation forest fitted in parallel (DETECTOR_N_JOBS, all cores by default).
+
+    max_samples=256 is the subsample size from the original paper;
+    larger subsamples do not separate anomalies better but make each
+    tree more expensive to build. n_jobs only affects fitting here;
+    large batches opt into parallel scoring in _score_batch.
+    """
+    return IsolationForest(
+        contamination=0.1,
+        random_state=42,
+        n_estimators=100,
+        max_samples=256,
+        n_jobs=_N_JOBS,
+    )
+
+
+def _build_svm(feature_count: int) -> Pipeline:
+    """One-class SVM on a Nystroem RBF approximation.
+
+    Prediction cost is a fixed 100-component projection plus a linear
+    score, independent of the number of training samples. gamma matches
+    OneClassSVM's gamma="scale" on standardized input.
+    """
+    return Pipeline(
+        [
+            (
+                "nystroem",
+                Nystroem(
+                    gamma=1.0 / feature_count,
+                    n_components=100,
+                    random_state=42,
+                ),
+            ),
+            ("ocsvm", SGDOneClassSVM(nu=0.1, random_state=42)),
+        ]
+    )
+
+
+def _to_float32(model):
+    """Downcast a fitted Nystroem pipeline saved with float64 weights.
+
+    Pipelines trained on float64 data keep float64 components, which
+    silently upcasts every float32 request back to double precision.
+    """
+    if isinstance(model, Pipeline) and isinstance(model[0], Nystroem):
+        nystroem = model[0]
+        nystroem.components_ = nystroem.components_.astype(np.float32, copy=False)
+        nystroem.normalization_ = nystroem.normalization_.astype(np.float32, copy=False)
+    return model
+
+
+def _average_path_length(n: np.ndarray) -> np.ndarray:
+    """Expected path length of an unsuccessful BST search over n samples"""
+    n = np.asarray(n, dtype=np.float64)
+    out = np.where(n == 2, 1.0, 0.0)
+    big = n > 2
+    out[big] = (
+        2.0 * (np.log(n[big] - 1.0) + np.euler_gamma) - 2.0 * (n[big] - 1.0) / n[big]
+    )
+    return out
+
+
+@dataclass
+class FlatForest:
+    """Isolation forest flattened into contiguous arrays for forest_path_lengths"""
+
+    feature: np.ndarray
+    threshold: np.ndarray
+    left: np.ndarray
+    right: np.ndarray
+    leaf_value: np.ndarray
+    roots: np.ndarray
+    denominator: float
+
+    @classmethod
+    def from_model(cls, model: IsolationForest) -> "FlatForest":
+        """Flatten a fitted forest, precomputing each leaf's path length"""
+        # Trees only see a column subset when features were subsampled
+        subsampled = model._max_features != model.n_features_in_
+        features, thresholds, lefts, rights, leaf_values, roots = [], [], [], [], [], []
+        offset = 0
+        for estimator, columns in zip(model.estimators_, model.estimators_features_):
+            tree = estimator.tree_
+            left = tree.children_left.astype(np.int64)
+            right = tree.children_right.astype(np.int64)
+            is_leaf = left == -1
+
+            depth = np.zeros(tree.node_count)
+            for node in range(tree.node_count):
+                if not is_leaf[node]:
+                    depth[left[node]] = depth[right[node]] = depth[node] + 1
+
+            feature = tree.feature.astype(np.int64)
+            if subsampled:
+                feature = np.where(is_leaf, feature, np.asarray(columns)[feature])
+
+            features.append(feature)
+            thresholds.append(tree.threshold)
+            lefts.append(np.where(is_leaf, -1, left + offset))
+            rights.append(np.where(is_leaf, -1, right + offset))
+            leaf_values.append(depth + _average_path_length(tree.n_node_samples))
+            roots.append(offset)
+            offset += tree.node_count
+
+        max_samples = getattr(model, "_max_samples", model.max_samples_)
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            left=np.concatenate(lefts),
+            right=np.concatenate(rights),
+            leaf_value=np.concatenate(leaf_values),
+            roots=np.asarray(roots, dtype=np.int64),
+            denominator=len(roots) * float(_average_path_length([max_samples])[0]),
+        )
+
+    def score_samples(self, X: np.ndarray, parallel: bool = True) -> np.ndarray:
+        """Same values as IsolationForest.score_samples"""
+        kernel = forest_path_lengths if parallel else forest_path_lengths_serial
+        depths = kernel(
+            X,
+            self.feature,
+            self.threshold,
+            self.left,
+            self.right,
+            self.leaf_value,
+            self.roots,
+        )
+        if self.denominator == 0:
+            return -np.ones(len(X))
+        return -(2.0 ** (-depths / self.denominator))
+
+
+def _fit_models(training_data: np.ndarray, algorithms, feature_count: int, on_progress):
+    """Fit the requested algorithms; returns (models, scalers, training_times)"""
+    models = {}
+    scalers = {}
+    training_times = {}
+
+    for i, algo in enumerate(algorithms):
+        start_time = time.time()
+
+        if algo == AlgorithmType.ISOLATION_FOREST.value:
+            models[algo] = _build_iforest()
+            models[algo].fit(training_data)
+
+        elif algo == AlgorithmType.ONE_CLASS_SVM.value:
+            scalers[algo] = StandardScaler()
+            scaled_data = scalers[algo].fit_transform(training_data)
+            models[algo] = _build_svm(feature_count)
+            models[algo].fit(scaled_data)
+
+        training_time = time.time() - start_time
+        training_times[algo] = training_time
+        on_progress(((i + 1) / len(algorithms)) * 100)
+
+        logger.info(f"Trained {algo} in {training_time:.2f} seconds")
+
+    return models, scalers, training_times
+
+
+# Shared progress counter, set in each training worker process
+_worker_progress = None
+
+
+def _init_training_worker(progress):
+    """ProcessPoolExecutor initializer for training workers"""
+    global _worker_progress
+    _worker_progress = progress
+
+
+def _set_worker_progress(value: float):
+    """Report training progress from a worker process"""
+    _worker_progress.value = value
+
+
+def _fit_models_in_worker(shm_name: str, shape, dtype: str, algorithms, feature_count):
+    """Training worker entry point; reads the data from shared memory"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        training_data = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        try:
+            return _fit_models(
+                training_data, algorithms, feature_count, _set_worker_progress
+            )
+        finally:
+            # The view must be released before the segment can be closed
+            del training_data
+    finally:
+        shm.close()
+
 
 class AdvancedAnomalyDetector:
     """Advanced anomaly detection with multiple algorithms"""
 
+    # Number of recent detections remembered for repeated feature vectors
+    RESULT_CACHE_SIZE = int(os.getenv("DETECTION_CACHE_SIZE", "10000"))
+    # Finished training jobs kept for /api/training-progress lookups
+    MAX_TRAINING_JOBS = 32
+    # Batches at least this large spread forest traversal over all cores
+    PARALLEL_SCORING_MIN_ROWS = 1000
+
     def __init__(self):
-        self.models = {}
-        self.scalers = {}
+        self._state = ModelState({}, {})
         self.feature_count = 1000
         self.db_manager = DatabaseManager()
         self.alert_manager = AlertManager()
         self.is_training = False
-        self.training_progress = 0
+        self._training_progress = _MP_CONTEXT.Value("d", 0.0)
+        self._training_pool = None
+        self._training_jobs = OrderedDict()
+        self._training_lock = threading.Lock()
+        self._install_lock = threading.RLock()
+        self._training_times = {}
+        # (model, FlatForest) for the numba isolation forest scorer
+        self._flat_forest = None
+        # Per-thread scratch buffers for single-sample scoring
+        self._tls = threading.local()
+        # Ensemble members release the GIL while scoring, so run them side by side
+        self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="ensemble")
+        self._result_cache = OrderedDict()
+        self._cache_lock = threading.RLock()
+        self._cache_hits = 0
+        self._cache_misses = 0
 
         # Initialize models
         self._initialize_models()
 
+    @property
+    def models(self) -> dict:
+        """Installed models by algorithm name"""
+        return self._state.models
+
+    @property
+    def scalers(self) -> dict:
+        """Fitted scalers by algorithm name"""
+        return self._state.scalers
+
+    @property
+    def model_version(self) -> str:
+        """Changes whenever models are (re)trained; used for HTTP ETags"""
+        return self._state.version
+
     def _initialize_models(self):
         """Initialize all detection models"""
         try:
@@ -51,39 +378,72 @@ class AdvancedAnomalyDetector:
         """Create default models with sample data"""
         logger.info("Creating default models...")
 
-        # Generate sample training data
-        np.random.seed(42)
-        normal_data = np.random.randn(1000, self.feature_count)
+        # Generate sample training data; 256 rows is one full isolation
+        # forest subsample and keeps the first fit to ~1 MB of float32
+        normal_data = np.random.default_rng(42).standard_normal(
+            (256, self.feature_count), dtype=np.float32
+        )
+
+        models = {}
+        scalers = {}
 
         # Isolation Forest
-        self.models[AlgorithmType.ISOLATION_FOREST.value] = IsolationForest(
-            contamination=0.1, random_state=42, n_estimators=100
-        )
-        self.models[AlgorithmType.ISOLATION_FOREST.value].fit(normal_data)
+        models[AlgorithmType.ISOLATION_FOREST.value] = _build_iforest()
+        models[AlgorithmType.ISOLATION_FOREST.value].fit(normal_data)
 
         # One-Class SVM
-        self.scalers[AlgorithmType.ONE_CLASS_SVM.value] = StandardScaler()
-        scaled_data = self.scalers[AlgorithmType.ONE_CLASS_SVM.value].fit_transform(
+        scalers[AlgorithmType.ONE_CLASS_SVM.value] = StandardScaler()
+        scaled_data = scalers[AlgorithmType.ONE_CLASS_SVM.value].fit_transform(
             normal_data
         )
-        self.models[AlgorithmType.ONE_CLASS_SVM.value] = OneClassSVM(
-            gamma="scale", nu=0.1
-        )
-        self.models[AlgorithmType.ONE_CLASS_SVM.value].fit(scaled_data)
+        models[AlgorithmType.ONE_CLASS_SVM.value] = _build_svm(self.feature_count)
+        models[AlgorithmType.ONE_CLASS_SVM.value].fit(scaled_data)
+        self._state = ModelState.build(models, scalers)
 
         # Save models
         self._save_models()
         logger.info("Default models created and saved")
 
+    def _scale_for_svm(self, X: np.ndarray, state: ModelState) -> np.ndarray:
+        """Standardize X with the cached SVM scaler constants.
+
+        Equivalent to StandardScaler.transform without input validation;
+        the result is written in place into a single output array. Single
+        rows reuse a per-thread buffer, so the result must be consumed
+        before the same thread scales again.
+        """
+        if len(X) == 1:
+            scaled = getattr(self._tls, "svm_row", None)
+            if scaled is None or scaled.shape != X.shape:
+                scaled = self._tls.svm_row = np.empty(X.shape, dtype=np.float32)
+            scale_row(X[0], state.svm_mean, state.svm_inv_scale, scaled[0])
+            return scaled
+
+        scaled = np.subtract(X, state.svm_mean)
+        np.multiply(scaled, state.svm_inv_scale, out=scaled)
+        return scaled
+
+    def _svm_scores(self, scaled_X: np.ndarray, state: ModelState):
+        """Return (decision_function, score_samples) for the SVM model"""
+        model = state.models[AlgorithmType.ONE_CLASS_SVM.value]
+        decision = model.decision_function(scaled_X)
+        # Models saved before the pipeline switch are bare OneClassSVMs
+        estimator = model[-1] if isinstance(model, Pipeline) else model
+        return decision, decision + estimator.offset_
+
     def _save_models(self):
         """Save models to disk"""
         os.makedirs("models", exist_ok=True)
+        state = self._state
 
-        for algorithm, model in self.models.items():
+        for algorithm, model in state.models.items():
             joblib.dump(model, f"models/{algorithm}_model.pkl")
 
-        for algorithm, scaler in self.scalers.items():
-            joblib.dump(scaler, f"models/{algorithm}_scaler.pkl")
+        # Only mean_ and scale_ are needed for inference; plain .npy files
+        # load as a memcpy instead of unpickling a StandardScaler
+        for algorithm, scaler in state.scalers.items():
+            np.save(f"models/{algorithm}_mean.npy", scaler.mean_.astype(np.float32))
+            np.save(f"models/{algorithm}_scale.npy", scaler.scale_.astype(np.float32))
 
     def _load_models(self):
         """Load models from disk"""
@@ -92,97 +452,408 @@ class AdvancedAnomalyDetector:
             AlgorithmType.ONE_CLASS_SVM.value: "models/one_class_svm_model.pkl",
         }
 
-        scaler_files = {
-            AlgorithmType.ONE_CLASS_SVM.value: "models/one_class_svm_scaler.pkl"
-        }
+        models = {}
+        scalers = {}
 
         for algorithm, file_path in model_files.items():
             if os.path.exists(file_path):
-                self.models[algorithm] = joblib.load(file_path)
-
-        for algorithm, file_path in scaler_files.items():
-            if os.path.exists(file_path):
-                self.scalers[algorithm] = joblib.load(file_path)
+                models[algorithm] = _to_float32(joblib.load(file_path))
+
+        if not models:
+            raise FileNotFoundError("No saved models found")
+
+        for algorithm in [AlgorithmType.ONE_CLASS_SVM.value]:
+            mean_path = f"models/{algorithm}_mean.npy"
+            scale_path = f"models/{algorithm}_scale.npy"
+            legacy_path = f"models/{algorithm}_scaler.pkl"
+            if os.path.exists(mean_path) and os.path.exists(scale_path):
+                scalers[algorithm] = InlineScaler(
+                    mean_=np.load(mean_path, mmap_mode="r"),
+                    scale_=np.load(scale_path, mmap_mode="r"),
+                )
+            elif os.path.exists(legacy_path):
+                scalers[algorithm] = joblib.load(legacy_path)
 
+        self._state = ModelState.build(models, scalers)
         logger.info("Models loaded successfully")
 
+    @property
+    def training_progress(self) -> float:
+        """Progress of the current training run, in percent"""
+        return self._training_progress.value
+
+    @staticmethod
+    def _algorithms_to_train(algorithm: str = None) -> List[str]:
+        """Algorithm names a training request covers"""
+        if algorithm:
+            return [algorithm]
+        return [algo.value for algo in AlgorithmType]
+
     def train_models(self, training_data: np.ndarray, algorithm: str = None):
-        """Train models with new data"""
+        """Train models with new data in this process"""
+        training_data = np.asarray(training_data, dtype=np.float32)
         self.is_training = True
-        self.training_progress = 0
+        self._training_progress.value = 0
 
         try:
-            algorithms_to_train = [algorithm] if algorithm else list(AlgorithmType)
-
-            for i, algo in enumerate(algorithms_to_train):
-                if isinstance(algo, AlgorithmType):
-                    algo = algo.value
+            fitted = _fit_models(
+                training_data,
+                self._algorithms_to_train(algorithm),
+                self.feature_count,
+                self._set_training_progress,
+            )
+            self._install_models(*fitted)
 
-                start_time = time.time()
+        finally:
+            self.is_training = False
+            self._training_progress.value = 100
 
-                if algo == AlgorithmType.ISOLATION_FOREST.value:
-                    self.models[algo] = IsolationForest(
-                        contamination=0.1, random_state=42, n_estimators=100
-                    )
-                    self.models[algo].fit(training_data)
+    def start_training(self, training_data: np.ndarray, algorithm: str = None) -> str:
+        """Train models in the background training process; returns a job id.
 
-                elif algo == AlgorithmType.ONE_CLASS_SVM.value:
-                    self.scalers[algo] = StandardScaler()
-                    scaled_data = self.scalers[algo].fit_transform(training_data)
-                    self.models[algo] = OneClassSVM(gamma="scale", nu=0.1)
-                    self.models[algo].fit(scaled_data)
+        The data is handed over through shared memory instead of being
+        pickled. Only one job runs at a time; a request made while one is
+        still running raises TrainingInProgressError. The fitted models are
+        installed here when the job finishes.
+        """
+        training_data = np.ascontiguousarray(training_data, dtype=np.float32)
 
-                training_time = time.time() - start_time
-                self.training_progress = ((i + 1) / len(algorithms_to_train)) * 100
+        with self._training_lock:
+            if not all(f.done() for f in self._training_jobs.values()):
+                raise TrainingInProgressError("A training job is already running")
 
-                logger.info(f"Trained {algo} in {training_time:.2f} seconds")
+            shm = shared_memory.SharedMemory(
+                create=True, size=max(training_data.nbytes, 1)
+            )
+            try:
+                shared = np.ndarray(training_data.shape, training_data.dtype, shm.buf)
+                shared[...] = training_data
+                # Drop the view so the segment can be closed once the job is done
+                del shared
+
+                if self._training_pool is None:
+                    self._training_pool = self._new_training_pool()
+
+                self.is_training = True
+                self._training_progress.value = 0
+                future = self._training_pool.submit(
+                    _fit_models_in_worker,
+                    shm.name,
+                    training_data.shape,
+                    training_data.dtype.str,
+                    self._algorithms_to_train(algorithm),
+                    self.feature_count,
+                )
+            except BaseException as e:
+                shm.close()
+                shm.unlink()
+                self.is_training = False
+                if isinstance(e, BrokenProcessPool):
+                    self._reset_training_pool()
+                raise
+
+            job_id = uuid.uuid4().hex
+            self._training_jobs[job_id] = future
+            # Forget the oldest finished jobs
+            while len(self._training_jobs) > self.MAX_TRAINING_JOBS:
+                oldest = next(iter(self._training_jobs))
+                if not self._training_jobs[oldest].done():
+                    break
+                del self._training_jobs[oldest]
+
+        future.add_done_callback(lambda f: self._finish_training(f, shm, job_id))
+        return job_id
+
+    def _new_training_pool(self) -> ProcessPoolExecutor:
+        """Single-worker process pool the training jobs run in"""
+        return ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=_MP_CONTEXT,
+            initializer=_init_training_worker,
+            initargs=(self._training_progress,),
+        )
 
-            self._save_models()
+    def _reset_training_pool(self):
+        """Replace a broken training pool so later jobs can be submitted"""
+        pool, self._training_pool = self._training_pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def training_job_status(self, job_id: str):
+        """State of a training job, or None if the id is unknown"""
+        future = self._training_jobs.get(job_id)
+        if future is None:
+            return None
+        if not future.done():
+            return "running" if future.running() else "pending"
+        return "failed" if future.exception() else "completed"
+
+    def _finish_training(self, future, shm, job_id: str):
+        """Install the models from a finished training job"""
+        shm.close()
+        shm.unlink()
 
+        try:
+            self._install_models(*future.result())
+            logger.info(f"Training job {job_id} completed")
+        except Exception as e:
+            logger.error(f"Training job {job_id} failed: {str(e)}")
+            if isinstance(e, BrokenProcessPool):
+                with self._training_lock:
+                    self._reset_training_pool()
         finally:
-            self.is_training = False
-            self.training_progress = 100
+            with self._training_lock:
+                self.is_training = not all(
+                    f.done() for f in self._training_jobs.values()
+                )
+
+    def _set_training_progress(self, value: float):
+        """Report training progress from this process"""
+        self._training_progress.value = value
+
+    def _install_models(self, models: dict, scalers: dict, training_times: dict):
+        """Swap in freshly fitted models and persist them.
+
+        The new ModelState is published with a single assignment, so a
+        detection running concurrently keeps scoring with the old state.
+        """
+        with self._install_lock:
+            state = self._state
+            self._training_times.update(training_times)
+            self._state = ModelState.build(
+                {**state.models, **models}, {**state.scalers, **scalers}
+            )
+            self._save_models()
+            self.clear_result_cache()
 
     def detect_anomaly(
         self, features: List[float], algorithm: str = None
     ) -> AnomalyResult:
-        """Detect anomaly using specified algorithm or ensemble"""
+        """Detect anomaly using specified algorithm or ensemble.
+
+        features may be a list or a 1-D array; arrays are used without copying.
+        """
         if len(features) != self.feature_count:
             raise ValueError(
                 f"Expected {self.feature_count} features, got {len(features)}"
             )
 
-        X = np.array(features).reshape(1, -1)
+        X = np.asarray(features, dtype=np.float32).reshape(1, -1)
+        # Results keep the float32 row rather than the caller's list
+        features = X[0]
+        state = self._state
+        if not (algorithm and algorithm in state.models):
+            algorithm = "ensemble"
+
+        # Entries are keyed by model version, so results from replaced models
+        # are never served again
+        key = (state.version, algorithm, _feature_digest(X))
+        with self._cache_lock:
+            cached = self._result_cache.get(key)
+            if cached is not None:
+                self._result_cache.move_to_end(key)
+                self._cache_hits += 1
+            else:
+                self._cache_misses += 1
+
+        if cached is not None:
+            # Identical input: reuse the scores but record a fresh detection
+            result = replace(cached, timestamp=datetime.now(), features=features)
+            self.db_manager.save_anomaly(result)
+            self.alert_manager.send_alert(result)
+            return result
+
+        if algorithm == "ensemble":
+            result = self._detect_ensemble(X, features, state)
+        else:
+            result = self._detect_single_algorithm(X, algorithm, features, state)
+
+        with self._cache_lock:
+            # Models installed while scoring have already cleared the cache
+            if self._state is state:
+                self._result_cache[key] = result
+                if len(self._result_cache) > self.RESULT_CACHE_SIZE:
+                    self._result_cache.popitem(last=False)
+
+        return result
+
+    def warmup(self):
+        """Run a dummy sample through every model without recording it.
+
+        The first real detection otherwise pays for page faults on freshly
+        loaded model arrays and one-time setup inside numpy/sklearn.
+        """
+        dummy = np.zeros((1, self.feature_count), dtype=np.float32)
+        state = self._state
+        for algorithm in state.models:
+            try:
+                self._score_batch(dummy, algorithm, state)
+            except Exception as e:
+                logger.warning(f"Warmup failed for {algorithm}: {str(e)}")
+        zscore_max(dummy.ravel())
+
+    def clear_result_cache(self):
+        """Forget cached detections, e.g. after the models change"""
+        with self._cache_lock:
+            self._result_cache.clear()
+
+    def cache_stats(self) -> dict:
+        """Hit/miss counters for the detection cache"""
+        with self._cache_lock:
+            lookups = self._cache_hits + self._cache_misses
+            return {
+                "size": len(self._result_cache),
+                "max_size": self.RESULT_CACHE_SIZE,
+                "hits": self._cache_hits,
+                "misses": self._cache_misses,
+                "hit_rate": self._cache_hits / lookups if lookups else 0.0,
+            }
+
+    def detect_anomaly_batch(
+        self, features_batch: List[List[float]], algorithm: str = None
+    ) -> List[AnomalyResult]:
+        """Detect anomalies for a batch of samples.
+
+        Each model is called once on the whole (n, feature_count) matrix
+        instead of once per sample; results are persisted in one bulk write.
+        """
+        X = np.ascontiguousarray(features_batch, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.feature_count:
+            raise ValueError(
+                f"Expected samples of {self.feature_count} features, "
+                f"got array of shape {X.shape}"
+            )
 
-        if algorithm and algorithm in self.models:
-            return self._detect_single_algorithm(X, algorithm, features)
+        state = self._state
+        if algorithm and algorithm in state.models:
+            labels, scores = self._score_batch(X, algorithm, state)
+            confidences = np.abs(scores)
         else:
-            return self._detect_ensemble(X, features)
+            algorithm = "ensemble"
+            labels, scores = self._vote_ensemble(X, state)
+            confidences = scores
+
+        timestamp = datetime.now()
+        alert_levels = self._determine_alert_levels(confidences, labels)
+        results = [
+            AnomalyResult(
+                timestamp=timestamp,
+                algorithm=algorithm,
+                is_anomaly=is_anomaly,
+                confidence=confidence,
+                anomaly_score=score,
+                features=row,
+                alert_level=alert_level,
+                description=self._generate_description(
+                    algorithm, confidence, is_anomaly
+                ),
+            )
+            for is_anomaly, confidence, score, row, alert_level in zip(
+                np.asarray(labels, dtype=bool).tolist(),
+                np.asarray(confidences, dtype=float).tolist(),
+                np.asarray(scores, dtype=float).tolist(),
+                # Rows stay float32 views; orjson serializes them natively
+                X,
+                alert_levels,
+            )
+        ]
+
+        self.db_manager.save_anomalies_bulk(results)
+        for result in results:
+            self.alert_manager.send_alert(result)
+
+        return results
+
+    def _iforest_scores(self, model: IsolationForest, X: np.ndarray) -> np.ndarray:
+        """IsolationForest.score_samples, compiled with numba when available"""
+        if forest_path_lengths is not None:
+            cached = self._flat_forest
+            if cached is None or cached[0] is not model:
+                cached = self._flat_forest = (model, FlatForest.from_model(model))
+            return cached[1].score_samples(
+                X, parallel=len(X) >= self.PARALLEL_SCORING_MIN_ROWS
+            )
+
+        # Fallback without numba
+        if len(X) >= self.PARALLEL_SCORING_MIN_ROWS:
+            # Tree traversal releases the GIL, so threads scale without
+            # pickling the forest; small batches are faster sequentially
+            with joblib.parallel_backend("threading", n_jobs=_N_JOBS):
+                return model.score_samples(X)
+        return model.score_samples(X)
+
+    def _score_batch(self, X: np.ndarray, algorithm: str, state: ModelState):
+        """Return (is_anomaly, score) arrays for every row of X"""
+        if algorithm == AlgorithmType.ISOLATION_FOREST.value:
+            model = state.models[algorithm]
+            scores = self._iforest_scores(model, X)
+            return scores < model.offset_, scores
+
+        if algorithm == AlgorithmType.ONE_CLASS_SVM.value:
+            decision, scores = self._svm_scores(self._scale_for_svm(X, state), state)
+            return decision < 0, scores
+
+        raise ValueError(f"Unknown algorithm: {algorithm}")
+
+    def _score_ensemble(self, X: np.ndarray, state: ModelState):
+        """Score X with every ensemble member concurrently.
+
+        Returns per-model lists of anomaly labels and absolute scores.
+        """
+        algorithms = [
+            algo
+            for algo in (
+                AlgorithmType.ISOLATION_FOREST.value,
+                AlgorithmType.ONE_CLASS_SVM.value,
+            )
+            if algo in state.models
+        ]
+        # Hand all but the last model to the pool and score that one here
+        futures = [
+            self._pool.submit(self._score_batch, X, algo, state)
+            for algo in algorithms[:-1]
+        ]
+        outputs = [self._score_batch(X, algo, state) for algo in algorithms[-1:]]
+        outputs = [future.result() for future in futures] + outputs
+
+        votes = [labels for labels, _ in outputs]
+        abs_scores = [np.abs(scores) for _, scores in outputs]
+        return votes, abs_scores
+
+    def _vote_ensemble(self, X: np.ndarray, state: ModelState):
+        """Majority vote and mean absolute score over the ensemble, per row.
+
+        Returns (is_anomaly, score) arrays; the score doubles as confidence.
+        """
+        votes, abs_scores = self._score_ensemble(X, state)
+        if not votes:
+            return np.ones(len(X), dtype=bool), np.zeros(len(X))
+
+        votes = np.stack(votes)
+        is_anomaly = votes.sum(axis=0) >= len(votes) / 2
+        return is_anomaly, np.stack(abs_scores).mean(axis=0)
 
     def _detect_single_algorithm(
-        self, X: np.ndarray, algorithm: str, features: List[float]
+        self, X: np.ndarray, algorithm: str, features: np.ndarray, state: ModelState
     ) -> AnomalyResult:
         """Detect anomaly using single algorithm"""
 
         if algorithm == AlgorithmType.ISOLATION_FOREST.value:
-            prediction = self.models[algorithm].predict(X)[0]
-            score = self.models[algorithm].score_samples(X)[0]
-            is_anomaly = prediction == -1
+            model = state.models[algorithm]
+            score = float(self._iforest_scores(model, X)[0])
+            is_anomaly = bool(score < model.offset_)
             confidence = abs(score)
 
         elif algorithm == AlgorithmType.ONE_CLASS_SVM.value:
-            scaled_X = self.scalers[algorithm].transform(X)
-            prediction = self.models[algorithm].predict(scaled_X)[0]
-            score = self.models[algorithm].score_samples(scaled_X)[0]
-            is_anomaly = prediction == -1
+            scaled_X = self._scale_for_svm(X, state)
+            decision, scores = self._svm_scores(scaled_X, state)
+            score = float(scores[0])
+            is_anomaly = bool(decision[0] < 0)
             confidence = abs(score)
 
         elif algorithm == AlgorithmType.STATISTICAL.value:
             # Statistical method using z-score
-            mean_val = np.mean(features)
-            std_val = np.std(features)
-            z_scores = np.abs((np.array(features) - mean_val) / std_val)
-            max_z_score = np.max(z_scores)
+            max_z_score = float(zscore_max(X.ravel()))
             is_anomaly = max_z_score > 3
             confidence = min(max_z_score / 3, 1.0)
             score = max_z_score
@@ -215,33 +886,16 @@ class AdvancedAnomalyDetector:
 
         return result
 
-    def _detect_ensemble(self, X: np.ndarray, features: List[float]) -> AnomalyResult:
+    def _detect_ensemble(
+        self, X: np.ndarray, features: np.ndarray, state: ModelState
+    ) -> AnomalyResult:
         """Detect anomaly using ensemble of algorithms"""
-        ensemble_predictions = []
-        ensemble_scores = []
-
-        for algo_type, model in self.models.items():
-            if algo_type == AlgorithmType.ISOLATION_FOREST.value:
-                prediction = model.predict(X)[0]
-                score = model.score_samples(X)[0]
-            elif algo_type == AlgorithmType.ONE_CLASS_SVM.value:
-                scaled_X = self.scalers[algo_type].transform(X)
-                prediction = model.predict(scaled_X)[0]
-                score = model.score_samples(scaled_X)[0]
-            else:
-                continue  # Skip statistical for ensemble for now
-
-            ensemble_predictions.append(
-                1 if prediction == -1 else 0
-            )  # 1 for anomaly, 0 for normal
-            ensemble_scores.append(abs(score))  # Use absolute score for consistency
+        # Statistical is skipped for ensemble for now
+        labels, scores = self._vote_ensemble(X, state)
+        is_anomaly = bool(labels[0])
 
-        # Simple majority vote for anomaly detection
-        is_anomaly = sum(ensemble_predictions) >= len(ensemble_predictions) / 2
-
-        # Average confidence and score
-        confidence = np.mean(ensemble_scores) if ensemble_scores else 0.0
-        anomaly_score = np.mean(ensemble_scores) if ensemble_scores else 0.0
+        # Average absolute score doubles as confidence
+        confidence = anomaly_score = float(scores[0])
 
         # Determine alert level
         alert_level = self._determine_alert_level(confidence, is_anomaly)
@@ -282,50 +936,82 @@ class AdvancedAnomalyDetector:
         else:
             return AlertLevel.LOW
 
+    @staticmethod
+    def _determine_alert_levels(confidences, labels) -> List[AlertLevel]:
+        """Vectorized _determine_alert_level over a whole batch"""
+        confidences = np.asarray(confidences)
+        labels = np.asarray(labels, dtype=bool)
+        levels = np.select(
+            [
+                ~labels,
+                confidences > 0.9,
+                confidences > 0.7,
+                confidences > 0.5,
+            ],
+            [0, 3, 2, 1],
+            default=0,
+        )
+        order = (
+            AlertLevel.LOW,
+            AlertLevel.MEDIUM,
+            AlertLevel.HIGH,
+            AlertLevel.CRITICAL,
+        )
+        return [order[level] for level in levels.tolist()]
+
     def _generate_description(
         self, algorithm: str, confidence: float, is_anomaly: bool
     ) -> str:
         """Generate human-readable description"""
-        if is_anomaly:
-            return f"{algorithm} detected anomaly with {confidence:.1%} confidence"
-        else:
-            return f"{algorithm} classified as normal with {confidence:.1%} confidence"
+        return _describe(algorithm, round(float(confidence), 3), bool(is_anomaly))
 
     def get_model_metrics(self) -> List[ModelMetrics]:
         """Get operational metrics for all loaded models.
 
         Precision, recall, f1_score, and accuracy are reported as 0.0
         because computing them requires a labeled validation set, which
-        is not available at runtime.  prediction_time is measured by
-        running a single sample through each model.
+        is not available at runtime.  prediction_time is measured once per
+        installed model by running a single sample through it, and
+        training_time is the fit time of the last training run (0.0 for
+        models loaded from disk).
         """
-        metrics = []
-        for algorithm in self.models.keys():
-            # Measure actual prediction latency on a single sample
-            sample = np.random.randn(1, self.feature_count)
-            try:
-                if (
-                    algorithm == AlgorithmType.ONE_CLASS_SVM.value
-                    and algorithm in self.scalers
-                ):
-                    sample = self.scalers[algorithm].transform(sample)
-                start = time.time()
-                self.models[algorithm].predict(sample)
-                prediction_time = time.time() - start
-            except Exception:
-                prediction_time = 0.0
-
-            metrics.append(
-                ModelMetrics(
-                    algorithm=algorithm,
-                    precision=0.0,
-                    recall=0.0,
-                    f1_score=0.0,
-                    accuracy=0.0,
-                    training_time=0.0,
-                    prediction_time=round(prediction_time, 6),
-                    last_updated=datetime.now(),
-                )
-            )
+        state = self._state
+        for algorithm in state.models:
+            if algorithm not in state.metrics:
+                state.metrics[algorithm] = self._measure_model(algorithm, state)
+        return list(state.metrics.values())
+
+    def _measure_model(self, algorithm: str, state: ModelState) -> ModelMetrics:
+        """Time one prediction through a model and build its metrics"""
+        sample = np.random.standard_normal((1, self.feature_count)).astype(np.float32)
+        try:
+            if (
+                algorithm == AlgorithmType.ONE_CLASS_SVM.value
+                and state.svm_mean is not None
+            ):
+                sample = self._scale_for_svm(sample, state)
+            start = time.perf_counter()
+            state.models[algorithm].predict(sample)
+            prediction_time = time.perf_counter() - start
+        except Exception:
+            prediction_time = 0.0
+
+        return ModelMetrics(
+            algorithm=algorithm,
+            precision=0.0,
+            recall=0.0,
+            f1_score=0.0,
+            accuracy=0.0,
+            training_time=round(self._training_times.get(algorithm, 0.0), 6),
+            prediction_time=round(prediction_time, 6),
+            last_updated=datetime.now(),
+        )
+
 
-        return metrics
+@lru_cache(maxsize=4096)
+def _describe(algorithm: str, confidence: float, is_anomaly: bool) -> str:
+    """Format a detection description; confidence is pre-rounded for caching"""
+    if is_anomaly:
+        return f"{algorithm} detected anomaly with {confidence:.1%} confidence"
+    else:
+        return f"{algorithm} classified as normal with {confidence:.1%} confidence"
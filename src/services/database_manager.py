@@ -1,36 +1,179 @@
 import sqlite3
-import json
 import logging
-from typing import List, Dict
+import threading
+import atexit
+import itertools
+from collections import deque
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Dict, Iterator, List
+
+import numpy as np
+import orjson
 
 from src.models.data_models import AnomalyResult, ModelMetrics
 
 logger = logging.getLogger(__name__)
 
+_INSERT_ANOMALY_SQL = """
+    INSERT INTO anomalies
+    (timestamp, algorithm, is_anomaly, confidence, anomaly_score,
+     features, alert_level, description)
+    VALUES
+"""
+
+_INSERT_METRICS_SQL = """
+    INSERT INTO model_metrics
+    (algorithm, precision_score, recall_score, f1_score,
+     accuracy, training_time, prediction_time)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+_INSERT_FEEDBACK_SQL = """
+    INSERT INTO feedback (anomaly_id, feedback_type, user_comment)
+    VALUES (?, ?, ?)
+"""
+
+# id breaks ties between equal timestamps
+_SELECT_ANOMALIES_SQL = (
+    "SELECT {columns} FROM anomalies"
+    " ORDER BY timestamp DESC, id DESC LIMIT ? OFFSET ?"
+)
+
+_SELECT_ANOMALIES_BY_ALGORITHM_SQL = (
+    "SELECT {columns} FROM anomalies WHERE algorithm = ?"
+    " ORDER BY timestamp DESC, id DESC LIMIT ? OFFSET ?"
+)
+
+# Every column except the feature blob, for listings that do not need it
+_ANOMALY_SUMMARY_COLUMNS = (
+    "id, timestamp, algorithm, is_anomaly, confidence, anomaly_score,"
+    " alert_level, description, feedback, created_at"
+)
+
+# Explicit list rather than *, so rows keep a fixed shape
+_ANOMALY_COLUMNS = _ANOMALY_SUMMARY_COLUMNS + ", features"
+
+_COUNT_ANOMALIES_SQL = "SELECT COUNT(*) FROM anomalies"
+
+# MAX of the INTEGER PRIMARY KEY is a single b-tree seek, unlike COUNT(*)
+_ANOMALIES_VERSION_SQL = "SELECT MAX(id) FROM anomalies"
+
+# PRAGMA user_version of the current on-disk layout: version 1 stores
+# features as float32 blobs, version 2 stores timestamps as INTEGER
+# microseconds since the epoch
+_SCHEMA_VERSION = 2
+# Legacy rows converted per statement when migrating feature storage
+_MIGRATION_BATCH = 500
+# Copies a legacy table into its INTEGER-timestamp replacement
+_COPY_TEXT_TIMESTAMPS_SQL = (
+    f"INSERT INTO anomalies_v2 ({_ANOMALY_COLUMNS}) SELECT "
+    + _ANOMALY_COLUMNS.replace("timestamp", "iso_to_micros(timestamp)", 1)
+    + " FROM anomalies"
+)
+
+# Timestamps are naive local times; storing their offset from a naive epoch
+# round-trips exactly, with no timezone or DST conversion
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+# Rows per multi-row INSERT; 8 parameters per row keeps each statement under
+# SQLite's historical 999 bound-variable limit.
+_MAX_ROWS_PER_INSERT = 124
+
+
+# Per-connection settings: WAL only needs fsync at checkpoints, temp tables
+# stay in memory, reads go through a 256 MB memory map and a 64 MB page cache
+_CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-65536",
+)
+
+
+def _apply_connection_pragmas(conn: sqlite3.Connection) -> None:
+    """Apply the per-connection PRAGMAs (journal_mode=WAL is set once per file)"""
+    for pragma in _CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+
+
+# Batch results share one datetime, so the last conversion is remembered
+@lru_cache(maxsize=1)
+def _timestamp_micros(timestamp: datetime) -> int:
+    """Stored INTEGER form of a result timestamp"""
+    return (timestamp - _EPOCH) // _MICROSECOND
+
+
+def _iso_to_micros(text: str) -> int:
+    """Convert a legacy ISO TEXT timestamp to its INTEGER form"""
+    return _timestamp_micros(datetime.fromisoformat(text))
+
+
+@lru_cache(maxsize=None)
+def _multi_insert_sql(row_count: int) -> str:
+    """Build an INSERT statement with row_count VALUES tuples"""
+    return _INSERT_ANOMALY_SQL + ",".join(["(?, ?, ?, ?, ?, ?, ?, ?)"] * row_count)
+
 
 class DatabaseManager:
     """Manages SQLite database operations"""
 
+    # Buffered anomaly writes are flushed when this many rows are pending
+    # or after FLUSH_INTERVAL seconds, whichever comes first.
+    FLUSH_BATCH_SIZE = 64
+    FLUSH_INTERVAL = 0.2
+
     def __init__(self, db_path: str = "anomaly_detection.db"):
         self.db_path = db_path
+        # Every statement is a module-level constant, so the per-connection
+        # prepared-statement cache hits on each call after the first.
+        self.conn = sqlite3.connect(
+            db_path,
+            check_same_thread=False,
+            isolation_level=None,
+            cached_statements=256,
+        )
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        _apply_connection_pragmas(self.conn)
+        self.conn.row_factory = sqlite3.Row
+        self._lock = threading.RLock()
+        self._pending = deque()
+        self._flush_event = threading.Event()
+        self._closed = False
+
         self.init_database()
+        # Running total of stored anomalies, so status polls skip COUNT(*)
+        self._anomaly_count = self.conn.execute(_COUNT_ANOMALIES_SQL).fetchone()[0]
+
+        self._flusher = threading.Thread(
+            target=self._flush_loop, name="anomaly-db-flusher", daemon=True
+        )
+        self._flusher.start()
+        atexit.register(self.close)
 
     def init_database(self):
         """Initialize database schema"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+        with self._lock:
+            cursor = self.conn.cursor()
+
+            # A file already at the current version has every table and
+            # index, so reopening it skips the DDL entirely
+            version = cursor.execute("PRAGMA user_version").fetchone()[0]
+            if version >= _SCHEMA_VERSION:
+                return
 
             # Create anomalies table
             cursor.execute(
                 """
                 CREATE TABLE IF NOT EXISTS anomalies (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp TEXT NOT NULL,
+                    timestamp INTEGER NOT NULL,
                     algorithm TEXT NOT NULL,
                     is_anomaly BOOLEAN NOT NULL,
                     confidence REAL NOT NULL,
                     anomaly_score REAL NOT NULL,
-                    features TEXT NOT NULL,
+                    features BLOB NOT NULL,
                     alert_level TEXT NOT NULL,
                     description TEXT,
                     feedback TEXT DEFAULT NULL,
@@ -70,72 +213,288 @@ class DatabaseManager:
             """
             )
 
-            conn.commit()
-            logger.info("Database initialized successfully")
+            if version < 1:
+                self._migrate_text_features(cursor)
+            if version < 2:
+                self._migrate_text_timestamps(cursor)
 
-    def save_anomaly(self, result: AnomalyResult) -> int:
-        """Save anomaly result to database"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+            # Indexes serving get_anomalies' ORDER BY timestamp DESC, id DESC,
+            # with and without the algorithm filter; ascending entries end in
+            # the rowid, so a backward scan yields both keys in order
             cursor.execute(
-                """
-                INSERT INTO anomalies
-                (timestamp, algorithm, is_anomaly, confidence, anomaly_score,
-                 features, alert_level, description)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-                (
-                    result.timestamp.isoformat(),
-                    result.algorithm,
-                    result.is_anomaly,
-                    result.confidence,
-                    result.anomaly_score,
-                    json.dumps(result.features),
-                    result.alert_level.value,
-                    result.description,
-                ),
+                "CREATE INDEX IF NOT EXISTS idx_anomalies_ts ON anomalies (timestamp)"
+            )
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_anomalies_algo_ts "
+                "ON anomalies (algorithm, timestamp)"
             )
-            anomaly_id = cursor.lastrowid
-            conn.commit()
-            return anomaly_id
 
-    def get_anomalies(self, limit: int = 100, algorithm: str = None) -> List[Dict]:
+            logger.info("Database initialized successfully")
+
+    def _migrate_text_features(self, cursor) -> None:
+        """Rewrite legacy JSON-text feature vectors as float32 blobs, once"""
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            ids = [
+                row[0]
+                for row in cursor.execute(
+                    "SELECT id FROM anomalies WHERE typeof(features) = 'text'"
+                )
+            ]
+            for i in range(0, len(ids), _MIGRATION_BATCH):
+                chunk = ids[i : i + _MIGRATION_BATCH]
+                placeholders = ",".join("?" * len(chunk))
+                rows = cursor.execute(
+                    f"SELECT id, features FROM anomalies WHERE id IN ({placeholders})",
+                    chunk,
+                ).fetchall()
+                cursor.executemany(
+                    "UPDATE anomalies SET features = ? WHERE id = ?",
+                    [
+                        (self._encode_features(orjson.loads(features)), row_id)
+                        for row_id, features in rows
+                    ],
+                )
+            cursor.execute("PRAGMA user_version = 1")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+        cursor.execute("COMMIT")
+
+        if ids:
+            logger.info(f"Converted {len(ids)} legacy feature rows to float32 blobs")
+
+    def _migrate_text_timestamps(self, cursor) -> None:
+        """Rebuild a legacy anomalies table with INTEGER timestamps, once"""
+        declared = {
+            row[1]: row[2] for row in cursor.execute("PRAGMA table_info(anomalies)")
+        }
+        rebuild = declared["timestamp"].upper() != "INTEGER"
+
+        # Column types cannot be altered in place, so legacy tables are
+        # copied into a new table that then takes over the name
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            if rebuild:
+                self.conn.create_function(
+                    "iso_to_micros", 1, _iso_to_micros, deterministic=True
+                )
+                cursor.execute(
+                    """
+                    CREATE TABLE anomalies_v2 (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        timestamp INTEGER NOT NULL,
+                        algorithm TEXT NOT NULL,
+                        is_anomaly BOOLEAN NOT NULL,
+                        confidence REAL NOT NULL,
+                        anomaly_score REAL NOT NULL,
+                        features BLOB NOT NULL,
+                        alert_level TEXT NOT NULL,
+                        description TEXT,
+                        feedback TEXT DEFAULT NULL,
+                        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+                    )
+                """
+                )
+                cursor.execute(_COPY_TEXT_TIMESTAMPS_SQL)
+                cursor.execute("DROP TABLE anomalies")
+                cursor.execute("ALTER TABLE anomalies_v2 RENAME TO anomalies")
+            cursor.execute("PRAGMA user_version = 2")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+        cursor.execute("COMMIT")
+
+    def save_anomaly(self, result: AnomalyResult) -> None:
+        """Queue anomaly result for the next batched write"""
+        self._pending.append(self._anomaly_row(result))
+        if len(self._pending) >= self.FLUSH_BATCH_SIZE:
+            self._flush_event.set()
+
+    def save_anomalies_bulk(self, results: List[AnomalyResult]) -> None:
+        """Save a batch of anomaly results in a single transaction"""
+        self._write_anomaly_rows([self._anomaly_row(r) for r in results])
+
+    def flush(self) -> None:
+        """Write all queued anomaly results to the database"""
+        # Draining and writing under one lock keeps rows in order and means a
+        # flush only returns once every row queued before it is committed
+        with self._lock:
+            rows = []
+            while self._pending:
+                rows.append(self._pending.popleft())
+            if rows:
+                self._write_anomaly_rows(rows)
+
+    def close(self) -> None:
+        """Flush pending writes and close the connection"""
+        if self._closed:
+            return
+        self._closed = True
+        self._flush_event.set()
+        self._flusher.join()
+        self.flush()
+        self.conn.close()
+
+    def _flush_loop(self):
+        """Background writer draining the anomaly buffer"""
+        while not self._closed:
+            self._flush_event.wait(self.FLUSH_INTERVAL)
+            self._flush_event.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Failed to flush anomalies: {str(e)}")
+
+    def _write_anomaly_rows(self, rows: List[tuple]) -> None:
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                for i in range(0, len(rows), _MAX_ROWS_PER_INSERT):
+                    chunk = rows[i : i + _MAX_ROWS_PER_INSERT]
+                    self.conn.execute(
+                        _multi_insert_sql(len(chunk)),
+                        list(itertools.chain.from_iterable(chunk)),
+                    )
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+            self._anomaly_count += len(rows)
+
+    @staticmethod
+    def _anomaly_row(result: AnomalyResult) -> tuple:
+        return (
+            _timestamp_micros(result.timestamp),
+            result.algorithm,
+            bool(result.is_anomaly),
+            result.confidence,
+            result.anomaly_score,
+            DatabaseManager._encode_features(result.features),
+            result.alert_level.value,
+            result.description,
+        )
+
+    @staticmethod
+    def _encode_features(features) -> bytes:
+        """Pack a feature vector as a float32 blob"""
+        return np.asarray(features, dtype=np.float32).tobytes()
+
+    @staticmethod
+    def _decode_features(value):
+        """Decode a stored feature vector (float32 blob or legacy JSON text).
+
+        Blobs come back as read-only float32 arrays over the row's bytes;
+        orjson serializes them directly, without boxing each value.
+        """
+        if isinstance(value, str):
+            return orjson.loads(value)
+        return np.frombuffer(value, dtype=np.float32)
+
+    @staticmethod
+    def _anomalies_query(
+        limit: int, algorithm: str, offset: int, include_features: bool = True
+    ):
+        """SQL and parameters for a page of anomalies, newest first"""
+        columns = _ANOMALY_COLUMNS if include_features else _ANOMALY_SUMMARY_COLUMNS
+        if algorithm:
+            query = _SELECT_ANOMALIES_BY_ALGORITHM_SQL.format(columns=columns)
+            return query, (algorithm, limit, offset)
+        return _SELECT_ANOMALIES_SQL.format(columns=columns), (limit, offset)
+
+    @staticmethod
+    def _decode_timestamp(value) -> str:
+        """ISO string of a stored timestamp (INTEGER microseconds or legacy TEXT)"""
+        if isinstance(value, str):
+            return value
+        return (_EPOCH + timedelta(microseconds=value)).isoformat()
+
+    def _row_to_dict(self, row: sqlite3.Row) -> Dict:
+        """Convert an anomalies row to a dict with decoded features"""
+        result = dict(row)
+        result["timestamp"] = self._decode_timestamp(result["timestamp"])
+        if "features" in result:
+            result["features"] = self._decode_features(result["features"])
+        return result
+
+    def get_anomalies(
+        self,
+        limit: int = 100,
+        algorithm: str = None,
+        offset: int = 0,
+        include_features: bool = True,
+    ) -> List[Dict]:
         """Retrieve anomalies from database"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+        self.flush()
+
+        query, params = self._anomalies_query(
+            limit, algorithm, offset, include_features
+        )
+        with self._lock:
+            rows = self.conn.execute(query, params).fetchall()
+
+        return [self._row_to_dict(row) for row in rows]
 
-            query = "SELECT * FROM anomalies"
-            params = []
+    def iter_anomalies(
+        self,
+        limit: int = 100,
+        algorithm: str = None,
+        offset: int = 0,
+        include_features: bool = True,
+    ) -> Iterator[Dict]:
+        """Yield anomalies newest first without materializing the result.
 
-            if algorithm:
-                query += " WHERE algorithm = ?"
-                params.append(algorithm)
+        Reads run on a private connection (WAL allows concurrent readers), so
+        a slow consumer never holds the shared connection's lock.
+        """
+        self.flush()
 
-            query += " ORDER BY timestamp DESC LIMIT ?"
-            params.append(limit)
+        query, params = self._anomalies_query(
+            limit, algorithm, offset, include_features
+        )
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        _apply_connection_pragmas(conn)
+        conn.row_factory = sqlite3.Row
+        try:
+            cursor = conn.execute(query, params)
+            cursor.arraysize = 1000
+            while True:
+                rows = cursor.fetchmany()
+                if not rows:
+                    break
+                for row in rows:
+                    yield self._row_to_dict(row)
+        finally:
+            conn.close()
 
-            cursor.execute(query, params)
-            columns = [description[0] for description in cursor.description]
+    def count_anomalies(self) -> int:
+        """Total number of anomaly detections, including queued writes.
 
-            results = []
-            for row in cursor.fetchall():
-                result = dict(zip(columns, row))
-                result["features"] = json.loads(result["features"])
-                results.append(result)
+        Read from a counter kept by this manager, so rows inserted by other
+        connections are only picked up on restart.
+        """
+        # Under the lock, so rows being flushed are counted exactly once
+        with self._lock:
+            return self._anomaly_count + len(self._pending)
 
-            return results
+    def anomalies_version(self) -> str:
+        """Token that changes whenever anomalies are added.
+
+        Built from the newest id and this manager's write counter; ids are
+        never reused (AUTOINCREMENT), so any insert or removal of the newest
+        row changes it.
+        """
+        self.flush()
+
+        with self._lock:
+            (max_id,) = self.conn.execute(_ANOMALIES_VERSION_SQL).fetchone()
+            return f"{self._anomaly_count}-{max_id}"
 
     def save_metrics(self, metrics: ModelMetrics):
         """Save model metrics to database"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                INSERT INTO model_metrics
-                (algorithm, precision_score, recall_score, f1_score,
-                 accuracy, training_time, prediction_time)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """,
+        with self._lock:
+            self.conn.execute(
+                _INSERT_METRICS_SQL,
                 (
                     metrics.algorithm,
                     metrics.precision,
@@ -146,19 +505,20 @@ class DatabaseManager:
                     metrics.prediction_time,
                 ),
             )
-            conn.commit()
 
     def save_feedback(
         self, anomaly_id: int, feedback_type: str, user_comment: str = ""
     ) -> None:
         """Save user feedback to database"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                INSERT INTO feedback (anomaly_id, feedback_type, user_comment)
-                VALUES (?, ?, ?)
-            """,
-                (anomaly_id, feedback_type, user_comment),
-            )
-            conn.commit()
+        self.save_feedback_many([(anomaly_id, feedback_type, user_comment)])
+
+    def save_feedback_many(self, feedback: List[tuple]) -> None:
+        """Save (anomaly_id, feedback_type, user_comment) rows in one transaction"""
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.executemany(_INSERT_FEEDBACK_SQL, feedback)
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
@@ -3,10 +3,15 @@ import pickle
 import numpy as np
 import logging
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Union
 
 logger = logging.getLogger(__name__)
 
+# Predictions whose magnitude exceeds the threshold are anomalies; confidence
+# is the magnitude over the scale, capped at 1
+_ANOMALY_THRESHOLD = 50.0
+_CONFIDENCE_SCALE = 100.0
+
 
 class AnomalyDetector:
     """
@@ -17,6 +22,7 @@ class AnomalyDetector:
         self.model = None
         self.model_path = model_path
         self.feature_count = 1000  # Expected number of features
+        self._session = None
         self.load_model()
 
     def load_model(self):
@@ -35,6 +41,58 @@ class AnomalyDetector:
             logger.error(f"Error loading model: {str(e)}")
             self.create_mock_model()
 
+        self._load_onnx_session()
+
+    def _load_onnx_session(self):
+        """
+        Serve predictions from an ONNX Runtime session when it is installed
+
+        The model is converted once to an .onnx file next to the pickle and
+        reconverted whenever the pickle is newer.
+        """
+        self._session = None
+        if self.model is None:
+            return
+        try:
+            import onnxruntime as ort
+        except ImportError:  # onnxruntime is optional; sklearn predicts without it
+            return
+
+        onnx_path = os.path.splitext(self.model_path)[0] + ".onnx"
+        try:
+            stale = not os.path.exists(onnx_path) or (
+                os.path.getmtime(onnx_path) < os.path.getmtime(self.model_path)
+            )
+            if stale:
+                # skl2onnx is only needed when the model has to be (re)converted
+                from skl2onnx import convert_sklearn
+                from skl2onnx.common.data_types import FloatTensorType
+
+                onx = convert_sklearn(
+                    self.model,
+                    initial_types=[("X", FloatTensorType([None, self.feature_count]))],
+                )
+                with open(onnx_path, "wb") as f:
+                    f.write(onx.SerializeToString())
+
+            self._session = ort.InferenceSession(
+                onnx_path, providers=["CPUExecutionProvider"]
+            )
+            self._session_input = self._session.get_inputs()[0].name
+            logger.info(f"ONNX Runtime session loaded from {onnx_path}")
+        except ImportError:
+            logger.info("skl2onnx is not installed, using sklearn")
+            self._session = None
+        except Exception as e:
+            logger.error(f"Error loading ONNX model, using sklearn: {str(e)}")
+            self._session = None
+
+    def _predict_rows(self, X: np.ndarray) -> np.ndarray:
+        """Predict a 2-D float32 array, through ONNX Runtime when available"""
+        if self._session is not None:
+            return self._session.run(None, {self._session_input: X})[0][:, 0]
+        return self.model.predict(X)
+
     def create_mock_model(self):
         """Create a mock model for demonstration purposes"""
         from sklearn.ensemble import RandomForestRegressor
@@ -55,32 +113,70 @@ class AnomalyDetector:
 
         logger.info("Mock model created and saved successfully")
 
-    def validate_features(self, features: List[float]) -> bool:
-        """Validate input features"""
-        if not isinstance(features, list):
-            return False
+    def feature_array(
+        self, features: Union[List[float], np.ndarray]
+    ) -> Optional[np.ndarray]:
+        """Convert input features to a float32 array, or None if invalid"""
+        # Numeric arrays are cast directly, without a round trip through a list;
+        # bools count as numeric, as they do in lists
+        if isinstance(features, np.ndarray):
+            if features.dtype.kind not in "fiub":
+                return None
+            if features.shape != (self.feature_count,):
+                return None
+            return features.astype(np.float32, copy=False)
 
-        if len(features) != self.feature_count:
-            return False
+        if not isinstance(features, (list, tuple)):
+            return None
 
-        # Check if all features are numeric
+        # One C-level conversion both checks and produces the model input
         try:
-            [float(f) for f in features]
-            return True
+            arr = np.asarray(features, dtype=np.float32)
         except (ValueError, TypeError):
-            return False
+            return None
+
+        if arr.shape != (self.feature_count,):
+            return None
+
+        # asarray turns None into NaN where float() would reject it
+        if np.isnan(arr).any() and None in features:
+            return None
+
+        return arr
+
+    def validate_features(self, features: Union[List[float], np.ndarray]) -> bool:
+        """Validate input features"""
+        return self.feature_array(features) is not None
 
-    def predict(self, features: List[float]) -> Dict[str, Any]:
+    def predict(self, features: Union[List[float], np.ndarray]) -> Dict[str, Any]:
         """
         Make prediction using the loaded model
 
         Args:
-            features: List of numerical features
+            features: List or 1-D array of numerical features
 
         Returns:
             Dictionary containing prediction and metadata
         """
-        if not self.validate_features(features):
+        arr = self.feature_array(features)
+        if arr is None:
+            raise ValueError(
+                f"Invalid features. Expected {self.feature_count} numerical values."
+            )
+
+        return self.predict_array(arr)
+
+    def predict_array(self, features: np.ndarray) -> Dict[str, Any]:
+        """
+        Make a prediction from an already converted feature array
+
+        Args:
+            features: 1-D array of feature_count numerical values
+
+        Returns:
+            Dictionary containing prediction and metadata
+        """
+        if features.shape != (self.feature_count,):
             raise ValueError(
                 f"Invalid features. Expected {self.feature_count} numerical values."
             )
@@ -89,26 +185,82 @@ class AnomalyDetector:
             raise RuntimeError("Model not loaded")
 
         try:
-            # Convert to numpy array and reshape for prediction
-            X = np.array(features).reshape(1, -1)
+            # Tree ensembles predict on float32; feature_array output is
+            # already float32 and is viewed as a row without copying
+            X = features.astype(np.float32, copy=False).reshape(1, -1)
 
             # Make prediction
-            prediction = self.model.predict(X)[0]
+            # Unbox once; the rest is plain Python float arithmetic
+            prediction = float(self._predict_rows(X)[0])
 
             # Calculate confidence (simplified approach)
-            confidence = min(abs(prediction) / 100.0, 1.0)
+            confidence = min(abs(prediction) / _CONFIDENCE_SCALE, 1.0)
 
             # Determine if it's an anomaly (simplified threshold)
-            is_anomaly = bool(abs(prediction) > 50.0)
+            is_anomaly = abs(prediction) > _ANOMALY_THRESHOLD
 
             return {
-                "prediction": float(prediction),
+                "prediction": prediction,
                 "is_anomaly": is_anomaly,
-                "confidence": float(confidence),
+                "confidence": confidence,
                 "timestamp": datetime.now().isoformat(),
-                "feature_count": len(features),
+                "feature_count": self.feature_count,
             }
 
         except Exception as e:
             logger.error(f"Prediction error: {str(e)}")
             raise RuntimeError(f"Prediction failed: {str(e)}")
+
+    def predict_batch(self, samples: List[List[float]]) -> List[Dict[str, Any]]:
+        """
+        Make predictions for many samples with a single model call
+
+        Args:
+            samples: List of feature lists, each with feature_count values
+
+        Returns:
+            List of prediction dictionaries, one per sample
+        """
+        try:
+            X = np.asarray(samples, dtype=np.float32)
+        except (ValueError, TypeError):
+            X = None
+
+        if X is None or X.ndim != 2 or X.shape[1] != self.feature_count:
+            X = None
+        elif np.isnan(X).any() and any(None in sample for sample in samples):
+            X = None
+
+        if X is None:
+            raise ValueError(
+                f"Invalid samples. Expected a list of lists of "
+                f"{self.feature_count} numerical values."
+            )
+
+        if self.model is None:
+            raise RuntimeError("Model not loaded")
+
+        try:
+            predictions = self._predict_rows(X)
+            magnitudes = np.abs(predictions)
+            confidences = np.minimum(magnitudes / _CONFIDENCE_SCALE, 1.0)
+            anomalies = magnitudes > _ANOMALY_THRESHOLD
+            timestamp = datetime.now().isoformat()
+
+            # tolist() unboxes each array in one C loop
+            return [
+                {
+                    "prediction": prediction,
+                    "is_anomaly": is_anomaly,
+                    "confidence": confidence,
+                    "timestamp": timestamp,
+                    "feature_count": self.feature_count,
+                }
+                for prediction, is_anomaly, confidence in zip(
+                    predictions.tolist(), anomalies.tolist(), confidences.tolist()
+                )
+            ]
+
+        except Exception as e:
+            logger.error(f"Batch prediction error: {str(e)}")
+            raise RuntimeError(f"Batch prediction failed: {str(e)}")
@@ -0,0 +1,107 @@
+import math
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:  # numba is optional; fall back to numpy reductions
+    numba = None
+
+
+def zscore_max_numpy(arr: np.ndarray) -> float:
+    """Largest absolute z-score of a 1-D array"""
+    centered = arr - arr.mean()
+    std_val = np.sqrt(np.dot(centered, centered) / centered.size)
+    if std_val == 0:
+        return 0.0
+    return float(np.abs(centered).max() / std_val)
+
+
+def scale_row_numpy(x: np.ndarray, mean: np.ndarray, inv_scale: np.ndarray, out):
+    """Write (x - mean) * inv_scale into out"""
+    np.subtract(x, mean, out=out)
+    np.multiply(out, inv_scale, out=out)
+    return out
+
+
+if numba is not None:
+
+    @numba.njit(cache=True, fastmath=True)
+    def scale_row(x, mean, inv_scale, out):
+        """Write (x - mean) * inv_scale into out in one fused sweep"""
+        for i in range(x.shape[0]):
+            out[i] = (x[i] - mean[i]) * inv_scale[i]
+        return out
+
+    @numba.njit(cache=True, fastmath=True)
+    def zscore_max(arr):
+        """Largest absolute z-score, fused into allocation-free loops.
+
+        The variance is accumulated around the mean rather than from the
+        sum of squares, which loses precision when values share a large
+        offset.
+        """
+        n = arr.shape[0]
+        s = 0.0
+        for i in range(n):
+            s += arr[i]
+        mean = s / n
+        var = 0.0
+        peak = 0.0
+        for i in range(n):
+            d = arr[i] - mean
+            var += d * d
+            if abs(d) > peak:
+                peak = abs(d)
+        if var <= 0.0:
+            return 0.0
+        return peak / math.sqrt(var / n)
+
+    @numba.njit(cache=True)
+    def _row_path_length(X, i, feature, threshold, left, right, leaf_value, roots):
+        """Summed isolation path length of row i over a flat forest"""
+        total = 0.0
+        for t in range(roots.shape[0]):
+            node = roots[t]
+            while left[node] != -1:
+                if X[i, feature[node]] <= threshold[node]:
+                    node = left[node]
+                else:
+                    node = right[node]
+            total += leaf_value[node]
+        return total
+
+    @numba.njit(cache=True, parallel=True)
+    def forest_path_lengths(X, feature, threshold, left, right, leaf_value, roots):
+        """Summed isolation path length of each row of X over a flat forest.
+
+        Trees are stored back to back; roots holds each tree's first node,
+        leaves have left == -1 and carry their full path-length contribution.
+        """
+        n_rows = X.shape[0]
+        out = np.zeros(n_rows)
+        for i in numba.prange(n_rows):
+            out[i] = _row_path_length(
+                X, i, feature, threshold, left, right, leaf_value, roots
+            )
+        return out
+
+    @numba.njit(cache=True)
+    def forest_path_lengths_serial(
+        X, feature, threshold, left, right, leaf_value, roots
+    ):
+        """forest_path_lengths without the thread fan-out, for small batches"""
+        n_rows = X.shape[0]
+        out = np.zeros(n_rows)
+        for i in range(n_rows):
+            out[i] = _row_path_length(
+                X, i, feature, threshold, left, right, leaf_value, roots
+            )
+        return out
+
+else:
+    scale_row = scale_row_numpy
+    zscore_max = zscore_max_numpy
+    # Without numba the forest is scored by scikit-learn itself
+    forest_path_lengths = None
+    forest_path_lengths_serial = None
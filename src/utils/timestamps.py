@@ -0,0 +1,17 @@
+import time
+from datetime import datetime
+
+# Status responses only need second resolution, so the ISO string is
+# formatted once per second and reused by every poll in between
+_iso_now_cache = (0, "")
+
+
+def iso_now() -> str:
+    """Current local time as an ISO string, truncated to whole seconds"""
+    global _iso_now_cache
+    second = int(time.time())
+    cached_second, text = _iso_now_cache
+    if second != cached_second:
+        text = datetime.fromtimestamp(second).isoformat()
+        _iso_now_cache = (second, text)
+    return text
@@ -8,12 +8,41 @@ import unittest
 import json
 import os
 import sys
+import tempfile
+from datetime import datetime
+
+import msgpack
 import numpy as np
 
+try:
+    import numba
+except ImportError:
+    numba = None
+
 # Add src directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
-from src.api.simple_app import app, AnomalyDetector  # noqa: E402
+from flask import Flask, jsonify, request  # noqa: E402
+
+from src.api.json_provider import OrjsonProvider  # noqa: E402
+from src.api.simple_app import app  # noqa: E402
+from src.models.data_models import AnomalyResult, AlertLevel  # noqa: E402
+from src.services.database_manager import DatabaseManager  # noqa: E402
+from src.services.simple_anomaly_detector import AnomalyDetector  # noqa: E402
+
+
+def make_result(algorithm="isolation_forest", is_anomaly=True, confidence=0.8):
+    """Build an AnomalyResult for database tests"""
+    return AnomalyResult(
+        timestamp=datetime.now(),
+        algorithm=algorithm,
+        is_anomaly=is_anomaly,
+        confidence=confidence,
+        anomaly_score=confidence,
+        features=np.full(10, 0.5, dtype=np.float32),
+        alert_level=AlertLevel.HIGH,
+        description="test",
+    )
 
 
 class TestAnomalyDetector(unittest.TestCase):
@@ -43,6 +72,19 @@ class TestAnomalyDetector(unittest.TestCase):
         features = ["string"] * 1000
         self.assertFalse(self.detector.validate_features(features))
 
+    def test_validate_features_none_values(self):
+        """Test feature validation rejects null values"""
+        features = [1.0] * 999 + [None]
+        self.assertFalse(self.detector.validate_features(features))
+
+    def test_validate_features_ndarray(self):
+        """Test feature validation accepts numeric arrays and tuples"""
+        self.assertTrue(self.detector.validate_features(np.arange(1000)))
+        self.assertTrue(self.detector.validate_features(tuple(range(1000))))
+        self.assertTrue(self.detector.validate_features(np.zeros(1000, dtype=bool)))
+        self.assertTrue(self.detector.validate_features([True] * 1000))
+        self.assertFalse(self.detector.validate_features(np.array(["a"] * 1000)))
+
     def test_predict_valid_features(self):
         """Test prediction with valid features"""
         features = [float(i) for i in range(1000)]
@@ -67,6 +109,33 @@ class TestAnomalyDetector(unittest.TestCase):
         with self.assertRaises(ValueError):
             self.detector.predict(features)
 
+    def test_predict_array_matches_predict(self):
+        """Test array prediction agrees with list prediction"""
+        features = [float(i) for i in range(1000)]
+        result = self.detector.predict_array(np.arange(1000, dtype=np.float64))
+
+        self.assertEqual(
+            result["prediction"], self.detector.predict(features)["prediction"]
+        )
+
+    def test_predict_batch_matches_predict(self):
+        """Test batch prediction agrees with single predictions"""
+        samples = [[float(i + j) for i in range(1000)] for j in range(3)]
+        results = self.detector.predict_batch(samples)
+
+        self.assertEqual(len(results), 3)
+        for sample, result in zip(samples, results):
+            single = self.detector.predict(sample)
+            self.assertAlmostEqual(result["prediction"], single["prediction"])
+            self.assertEqual(result["is_anomaly"], single["is_anomaly"])
+
+    def test_predict_batch_invalid_shape(self):
+        """Test batch prediction rejects ragged or short samples"""
+        with self.assertRaises(ValueError):
+            self.detector.predict_batch([[1.0, 2.0, 3.0]])
+        with self.assertRaises(ValueError):
+            self.detector.predict_batch([[0.0] * 1000, [0.0] * 999])
+
     def test_model_loading(self):
         """Test model loading functionality"""
         # Test that model is loaded or created
@@ -87,6 +156,21 @@ class TestFlaskAPI(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertIn("text/html", response.content_type)
 
+    def test_index_endpoint_not_modified(self):
+        """Test the index honours If-None-Match"""
+        etag = self.app.get("/").headers["ETag"]
+        response = self.app.get("/", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+
+    def test_index_endpoint_gzip(self):
+        """Test the index is served precompressed when accepted"""
+        import gzip
+
+        plain = self.app.get("/")
+        response = self.app.get("/", headers={"Accept-Encoding": "gzip, br"})
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.data), plain.data)
+
     def test_status_endpoint(self):
         """Test the status endpoint"""
         response = self.app.get("/api/status")
@@ -154,6 +238,38 @@ class TestFlaskAPI(unittest.TestCase):
         data = json.loads(response.data)
         self.assertEqual(data["status"], "error")
 
+    def test_predict_batch_endpoint(self):
+        """Test batch predict endpoint"""
+        payload = {"samples": [[float(i) for i in range(1000)]] * 4}
+
+        response = self.app.post(
+            "/predict-batch", data=json.dumps(payload), content_type="application/json"
+        )
+
+        self.assertEqual(response.status_code, 200)
+
+        data = json.loads(response.data)
+        self.assertEqual(data["status"], "success")
+        self.assertEqual(data["total_processed"], 4)
+        self.assertEqual(len(data["results"]), 4)
+        self.assertIn("is_anomaly", data["results"][0])
+
+    def test_predict_msgpack_endpoint(self):
+        """Test msgpack predict endpoint with raw float32 features"""
+        features = np.arange(1000, dtype="<f4")
+        payload = msgpack.packb({"features": features.tobytes()})
+
+        response = self.app.post(
+            "/predict-msgpack", data=payload, content_type="application/msgpack"
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, "application/msgpack")
+
+        data = msgpack.unpackb(response.data)
+        self.assertEqual(data["status"], "success")
+        self.assertIn("prediction", data)
+
     def test_predict_endpoint_no_json(self):
         """Test predict endpoint with no JSON data"""
         response = self.app.post("/predict")
@@ -173,6 +289,393 @@ class TestFlaskAPI(unittest.TestCase):
         self.assertIn("available_endpoints", data)
 
 
+class TestOrjsonProvider(unittest.TestCase):
+    """Test cases for the orjson JSON provider"""
+
+    def setUp(self):
+        """Set up a minimal app using the provider"""
+        provider_app = Flask(__name__)
+        provider_app.json = OrjsonProvider(provider_app)
+
+        @provider_app.route("/echo", methods=["POST"])
+        def echo():
+            data = request.get_json()
+            return jsonify(
+                {
+                    "total": np.float32(sum(data["values"])),
+                    "flags": np.array([True, False]),
+                    "when": datetime(2025, 1, 1, 12, 0, 0),
+                }
+            )
+
+        self.app = provider_app.test_client()
+
+    def test_round_trip(self):
+        """Test numpy values serialize and dates keep Flask's format"""
+        response = self.app.post("/echo", json={"values": [1.5, 2.5]})
+        self.assertEqual(response.status_code, 200)
+
+        data = json.loads(response.data)
+        self.assertEqual(data["total"], 4.0)
+        self.assertEqual(data["flags"], [True, False])
+        self.assertEqual(data["when"], "Wed, 01 Jan 2025 12:00:00 GMT")
+
+    def test_invalid_json(self):
+        """Test malformed request bodies are rejected with 400"""
+        response = self.app.post(
+            "/echo", data="{not json", content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class TestDatabaseManager(unittest.TestCase):
+    """Test cases for DatabaseManager"""
+
+    def setUp(self):
+        """Set up a throwaway database"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db = DatabaseManager(os.path.join(self.tmpdir.name, "test.db"))
+
+    def tearDown(self):
+        """Close the database and remove it"""
+        self.db.close()
+        self.tmpdir.cleanup()
+
+    def test_result_to_dict(self):
+        """Test AnomalyResult.to_dict is JSON-ready and omits features"""
+        data = make_result().to_dict()
+
+        self.assertEqual(data["alert_level"], "high")
+        self.assertNotIn("features", data)
+        json.dumps(data)
+
+    def test_save_anomaly_visible_to_reads(self):
+        """Test buffered writes are flushed before reading"""
+        self.db.save_anomaly(make_result())
+        anomalies = self.db.get_anomalies(10)
+
+        self.assertEqual(len(anomalies), 1)
+        self.assertEqual(anomalies[0]["algorithm"], "isolation_forest")
+        self.assertEqual(anomalies[0]["features"].tolist(), [0.5] * 10)
+
+    def test_legacy_json_features(self):
+        """Test rows written with JSON-encoded features still decode"""
+        self.db.conn.execute(
+            "INSERT INTO anomalies (timestamp, algorithm, is_anomaly, confidence,"
+            " anomaly_score, features, alert_level) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (datetime.now().isoformat(), "legacy", 0, 0.1, 0.1, "[1.0, 2.0]", "low"),
+        )
+        self.assertEqual(self.db.get_anomalies(1)[0]["features"], [1.0, 2.0])
+
+    def test_legacy_features_migrated_on_open(self):
+        """Test JSON-text features and ISO timestamps are migrated on open"""
+        import sqlite3
+
+        self.db.close()
+        path = os.path.join(self.tmpdir.name, "legacy.db")
+        timestamp = datetime(2024, 5, 1, 12, 30, 15, 250).isoformat()
+        conn = sqlite3.connect(path)
+        conn.execute(
+            "CREATE TABLE anomalies (id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " timestamp TEXT NOT NULL, algorithm TEXT NOT NULL,"
+            " is_anomaly BOOLEAN NOT NULL, confidence REAL NOT NULL,"
+            " anomaly_score REAL NOT NULL, features TEXT NOT NULL,"
+            " alert_level TEXT NOT NULL, description TEXT,"
+            " feedback TEXT DEFAULT NULL,"
+            " created_at TEXT DEFAULT CURRENT_TIMESTAMP)"
+        )
+        conn.execute(
+            "INSERT INTO anomalies (timestamp, algorithm, is_anomaly, confidence,"
+            " anomaly_score, features, alert_level) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (timestamp, "legacy", 0, 0.1, 0.1, "[1.0, 2.0]", "low"),
+        )
+        conn.commit()
+        conn.close()
+
+        self.db = DatabaseManager(path)
+        kinds = self.db.conn.execute(
+            "SELECT typeof(timestamp), typeof(features) FROM anomalies"
+        ).fetchone()
+        self.assertEqual(tuple(kinds), ("integer", "blob"))
+        row = self.db.get_anomalies(1)[0]
+        self.assertEqual(row["timestamp"], timestamp)
+        self.assertEqual(row["features"].tolist(), [1.0, 2.0])
+
+    def test_save_anomalies_bulk(self):
+        """Test bulk insert across statement chunks and algorithm filter"""
+        results = [make_result() for _ in range(300)]
+        results.append(make_result(algorithm="ensemble", is_anomaly=False))
+        self.db.save_anomalies_bulk(results)
+
+        self.assertEqual(len(self.db.get_anomalies(1000)), 301)
+        self.assertEqual(self.db.count_anomalies(), 301)
+        ensemble = self.db.get_anomalies(100, "ensemble")
+        self.assertEqual(len(ensemble), 1)
+        self.assertFalse(ensemble[0]["is_anomaly"])
+
+    def test_save_feedback_many(self):
+        """Test feedback rows are inserted together"""
+        self.db.save_feedback_many([(1, "correct", ""), (2, "false_positive", "x")])
+
+        count = self.db.conn.execute("SELECT COUNT(*) FROM feedback").fetchone()[0]
+        self.assertEqual(count, 2)
+
+    def test_iter_anomalies_pages(self):
+        """Test streamed reads honour limit and offset"""
+        self.db.save_anomalies_bulk([make_result() for _ in range(25)])
+
+        rows = list(self.db.iter_anomalies(limit=10, offset=20))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]["features"].tolist(), [0.5] * 10)
+        self.assertEqual(len(self.db.get_anomalies(10, offset=20)), 5)
+
+    def test_get_anomalies_without_features(self):
+        """Test listings can skip the feature blob"""
+        self.db.save_anomaly(make_result())
+
+        row = self.db.get_anomalies(1, include_features=False)[0]
+        self.assertNotIn("features", row)
+        self.assertEqual(row["algorithm"], "isolation_forest")
+
+    def test_anomalies_version_changes_on_write(self):
+        """Test the anomalies version token changes after a save"""
+        before = self.db.anomalies_version()
+        self.db.save_anomaly(make_result())
+        self.assertNotEqual(self.db.anomalies_version(), before)
+
+
+class TestAdvancedAPI(unittest.TestCase):
+    """Test cases for the advanced API in src/api/app.py"""
+
+    @classmethod
+    def setUpClass(cls):
+        """Import the app inside a temporary directory"""
+        import importlib
+
+        # The detector keeps its database and models relative to the CWD
+        cls.cwd = os.getcwd()
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        os.chdir(cls.tmpdir.name)
+        cls.module = importlib.import_module("src.api.app")
+        cls.detector = cls.module.get_detector()
+        cls.client = cls.module.app.test_client()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Leave the temporary directory"""
+        cls.detector.db_manager.flush()
+        os.chdir(cls.cwd)
+        cls.tmpdir.cleanup()
+
+    def test_import_builds_no_detector(self):
+        """Test importing the app, as spawned training workers do, is side-effect free"""
+        import subprocess
+
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        with tempfile.TemporaryDirectory() as tmpdir:
+            subprocess.run(
+                [
+                    sys.executable,
+                    "-c",
+                    "import src.api.app as app; assert app._detector is None",
+                ],
+                cwd=tmpdir,
+                env=dict(os.environ, PYTHONPATH=root),
+                check=True,
+            )
+            self.assertEqual(os.listdir(tmpdir), [])
+
+    def samples(self, rows):
+        """Random feature rows of the detector's width"""
+        rng = np.random.default_rng(0)
+        return rng.standard_normal((rows, self.detector.feature_count)).tolist()
+
+    def test_detect(self):
+        """Test single detection"""
+        response = self.client.post(
+            "/api/detect", json={"features": self.samples(1)[0]}
+        )
+        self.assertEqual(response.status_code, 200)
+
+        data = response.get_json()
+        self.assertEqual(data["status"], "success")
+        self.assertIn("is_anomaly", data)
+        self.assertNotIn("features", data)
+
+    def test_detect_missing_features(self):
+        """Test single detection without features"""
+        response = self.client.post("/api/detect", json={})
+        self.assertEqual(response.status_code, 400)
+
+    def test_detection_cache_hit(self):
+        """Test a repeated input reuses its scores but is recorded again"""
+        import time
+
+        features = np.asarray(self.samples(1)[0], dtype=np.float32) + 0.5
+        first = self.detector.detect_anomaly(features)
+        hits = self.detector.cache_stats()["hits"]
+        saved = self.detector.db_manager.count_anomalies()
+        time.sleep(0.001)
+
+        second = self.detector.detect_anomaly(features)
+        self.assertEqual(self.detector.cache_stats()["hits"], hits + 1)
+        self.assertEqual(second.anomaly_score, first.anomaly_score)
+        self.assertEqual(second.is_anomaly, first.is_anomaly)
+        self.assertGreater(second.timestamp, first.timestamp)
+        self.assertEqual(self.detector.db_manager.count_anomalies(), saved + 1)
+
+    def test_detection_cache_invalidated_by_new_models(self):
+        """Test results scored before a model install are not served after it"""
+        from unittest import mock
+
+        features = np.asarray(self.samples(1)[0], dtype=np.float32) + 1.5
+        detect = self.detector._detect_ensemble
+
+        def detect_during_install(*args):
+            # Models are installed while this detection is being scored
+            result = detect(*args)
+            self.detector._install_models({}, {}, {})
+            return result
+
+        with mock.patch.object(
+            self.detector, "_detect_ensemble", side_effect=detect_during_install
+        ):
+            self.detector.detect_anomaly(features)
+
+        hits = self.detector.cache_stats()["hits"]
+        self.detector.detect_anomaly(features)
+        self.assertEqual(self.detector.cache_stats()["hits"], hits)
+
+        self.detector.detect_anomaly(features)
+        self.assertEqual(self.detector.cache_stats()["hits"], hits + 1)
+        self.detector._install_models({}, {}, {})
+        self.detector.detect_anomaly(features)
+        self.assertEqual(self.detector.cache_stats()["hits"], hits + 1)
+
+    def test_install_models_replaces_state(self):
+        """Test installing models publishes a new state and leaves the old one"""
+        state = self.detector._state
+        self.detector._install_models({}, {}, {})
+
+        self.assertIsNot(self.detector._state, state)
+        self.assertNotEqual(self.detector.model_version, state.version)
+        self.assertEqual(self.detector.models, state.models)
+        self.assertIs(self.detector._state.svm_mean is None, state.svm_mean is None)
+
+    def test_detect_batch(self):
+        """Test vectorized batch detection"""
+        response = self.client.post(
+            "/api/detect-batch", json={"samples": self.samples(5)}
+        )
+        self.assertEqual(response.status_code, 200)
+
+        data = response.get_json()
+        self.assertEqual(data["total_processed"], 5)
+        self.assertEqual(len(data["results"]), 5)
+
+        response = self.client.post("/api/detect-batch", json={"samples": [[1.0, 2.0]]})
+        self.assertEqual(response.status_code, 400)
+
+    def test_batch_detect_json_records(self):
+        """Test JSON records are matched by key, not by position"""
+        import io
+
+        rows = self.samples(2)
+        columns = [f"f{i}" for i in range(self.detector.feature_count)]
+        records = [dict(zip(columns, row)) for row in rows]
+        # The same values with the keys in reverse order score the same
+        records.append(dict(reversed(list(records[0].items()))))
+
+        response = self.client.post(
+            "/api/batch-detect",
+            data={"file": (io.BytesIO(json.dumps(records).encode()), "rows.json")},
+        )
+        self.assertEqual(response.status_code, 200)
+        results = response.get_json()["results"]
+        self.assertEqual(len(results), 3)
+        self.assertAlmostEqual(
+            results[0]["anomaly_score"], results[2]["anomaly_score"], places=6
+        )
+
+        del records[1][columns[0]]
+        response = self.client.post(
+            "/api/batch-detect",
+            data={"file": (io.BytesIO(json.dumps(records).encode()), "rows.json")},
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Record 1", response.get_json()["error"])
+
+    def test_history_conditional_get(self):
+        """Test history paging and If-None-Match"""
+        self.client.post("/api/detect-batch", json={"samples": self.samples(3)})
+
+        response = self.client.get("/api/history?limit=2")
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(data["status"], "success")
+        self.assertEqual(data["total"], 2)
+        self.assertNotIn("features", data["history"][0])
+
+        etag = response.headers["ETag"].strip('"')
+        response = self.client.get(
+            "/api/history?limit=2", headers={"If-None-Match": f'"{etag}"'}
+        )
+        self.assertEqual(response.status_code, 304)
+
+        self.client.post("/api/detect-batch", json={"samples": self.samples(1)})
+        response = self.client.get(
+            "/api/history?limit=2", headers={"If-None-Match": f'"{etag}"'}
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_history_ndjson(self):
+        """Test history streamed as NDJSON"""
+        self.client.post("/api/detect-batch", json={"samples": self.samples(2)})
+
+        response = self.client.get("/api/history?limit=2&format=ndjson")
+        self.assertEqual(response.mimetype, "application/x-ndjson")
+        lines = response.data.splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertIn("timestamp", json.loads(lines[0]))
+
+    def test_status(self):
+        """Test the status payload and its ETag"""
+        response = self.client.get("/api/status")
+        self.assertEqual(response.status_code, 200)
+
+        data = response.get_json()
+        self.assertEqual(data["status"], "healthy")
+        self.assertTrue(data["database_connected"])
+        self.assertIn("timestamp", data)
+        self.assertIn("detection_cache", data)
+
+        response = self.client.get(
+            "/api/status", headers={"If-None-Match": response.headers["ETag"]}
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_train_rejects_concurrent_jobs(self):
+        """Test training starts a job and refuses a second while it runs"""
+        import time
+
+        payload = {"training_data": self.samples(200)}
+        response = self.client.post("/api/train", json=payload)
+        self.assertEqual(response.status_code, 202)
+        job_id = response.get_json()["job_id"]
+
+        response = self.client.post("/api/train", json=payload)
+        self.assertEqual(response.status_code, 409)
+
+        deadline = time.time() + 300
+        while self.detector.training_job_status(job_id) in ("pending", "running"):
+            self.assertLess(time.time(), deadline)
+            time.sleep(0.2)
+        self.assertEqual(self.detector.training_job_status(job_id), "completed")
+
+        response = self.client.get(f"/api/training-progress?job_id={job_id}")
+        self.assertEqual(response.get_json()["job_status"], "completed")
+
+
 class TestIntegration(unittest.TestCase):
     """Integration tests"""
 
@@ -239,6 +742,34 @@ class TestPerformance(unittest.TestCase):
         self.assertLess(avg_time, 1.0)
 
 
+@unittest.skipIf(numba is None, "numba is not installed")
+class TestFlatForest(unittest.TestCase):
+    """Test the numba isolation forest kernels against scikit-learn"""
+
+    def test_scores_match_isolation_forest(self):
+        """Test FlatForest scores equal IsolationForest.score_samples"""
+        from sklearn.ensemble import IsolationForest
+
+        from src.services.anomaly_detector import FlatForest
+
+        rng = np.random.default_rng(0)
+        X = rng.standard_normal((300, 20)).astype(np.float32)
+        for max_features in (1.0, 0.5):
+            model = IsolationForest(
+                n_estimators=20, max_features=max_features, random_state=0
+            ).fit(X)
+            forest = FlatForest.from_model(model)
+            expected = model.score_samples(X)
+
+            for parallel in (True, False):
+                np.testing.assert_allclose(
+                    forest.score_samples(X, parallel=parallel), expected
+                )
+            np.testing.assert_allclose(
+                forest.score_samples(X[:1], parallel=False), expected[:1]
+            )
+
+
 if __name__ == "__main__":
     # Create test suite
     test_suite = unittest.TestSuite()
@@ -246,8 +777,12 @@ if __name__ == "__main__":
     # Add test cases
     test_suite.addTest(unittest.makeSuite(TestAnomalyDetector))
     test_suite.addTest(unittest.makeSuite(TestFlaskAPI))
+    test_suite.addTest(unittest.makeSuite(TestOrjsonProvider))
+    test_suite.addTest(unittest.makeSuite(TestDatabaseManager))
+    test_suite.addTest(unittest.makeSuite(TestAdvancedAPI))
     test_suite.addTest(unittest.makeSuite(TestIntegration))
     test_suite.addTest(unittest.makeSuite(TestPerformance))
+    test_suite.addTest(unittest.makeSuite(TestFlatForest))
 
     # Run tests
     runner = unittest.TextTestRunner(verbosity=2)
@@ -0,0 +1,12 @@
+"""
+WSGI entry point for production servers
+Author: Gabriel Demetrios Lafis
+
+Run with:
+    gunicorn -k gthread --threads 8 -b 0.0.0.0:5000 wsgi:app
+"""
+
+from src.api.app import app, get_detector  # noqa: F401
+
+# Load the models when the worker starts rather than on its first request
+get_detector()